@@ -0,0 +1,54 @@
+"""Micro-benchmarks for BugyiError construction.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_errors.py
+"""
+
+import inspect
+import timeit
+
+from bugyi import errors, meta
+from bugyi.errors import BugyiError
+
+
+class _StackInspector:
+    """The old (pre-lazy) meta.Inspector implementation."""
+
+    def __init__(self, *, up: int = 0) -> None:
+        frame = inspect.stack()[up + 1]
+
+        self.module_name = meta._path_to_module(frame[1])
+        self.file_name = frame[1]
+        self.line_number = frame[2]
+        self.function_name = frame[3]
+        self.lines = "".join(frame[4] or [])
+
+
+def _construct(depth: int) -> BugyiError:
+    if depth > 0:
+        return _construct(depth - 1)
+    return BugyiError("benchmark error")
+
+
+def _bench(label: str, depth: int, number: int) -> float:
+    usec = timeit.timeit(lambda: _construct(depth), number=number)
+    usec = usec / number * 1e6
+    print(f"{label:<12} depth={depth:<4} {usec:>10.2f} usec/error")
+    return usec
+
+
+def main() -> None:
+    number = 2000
+    for depth in [0, 10, 50]:
+        try:
+            errors.Inspector = _StackInspector  # type: ignore
+            before = _bench("before", depth, number)
+        finally:
+            errors.Inspector = meta.Inspector  # type: ignore
+
+        after = _bench("after", depth, number)
+        print(f"{'speedup':<12} depth={depth:<4} {before / after:>10.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Micro-benchmarks for bugyi.git_tools.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_git_tools.py
+"""
+
+import os
+import subprocess as sp
+import tempfile
+import timeit
+from typing import Callable
+
+from bugyi import git_tools
+
+
+def _bench(label: str, func: Callable[[], object], number: int) -> float:
+    usec = timeit.timeit(func, number=number) / number * 1e6
+    print(f"{label:<24} {usec:>12.2f} usec/call")
+    return usec
+
+
+def bench_remotes(nremotes: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as repo:
+        sp.check_call(["git", "init", "-q", repo])
+        with open(os.path.join(repo, ".git", "config"), "a") as f:
+            for i in range(nremotes):
+                f.write(
+                    f'[remote "remote{i:03}"]\n'
+                    f"\turl = https://example.com/repo{i}.git\n"
+                    f"\tfetch = +refs/heads/*:refs/remotes/remote{i:03}/*\n"
+                )
+
+        os.chdir(repo)
+        assert git_tools.remotes() == git_tools._git_remotes()
+        assert len(git_tools.remotes().unwrap()) == nremotes
+
+        print(f"----- remotes() ({nremotes} remotes)")
+        before = _bench("git remote -v", git_tools._git_remotes, 20)
+        after = _bench(".git/config parser", git_tools.remotes, 200)
+        print(f"{'speedup':<24} {before / after:>12.1f}x\n")
+
+
+if __name__ == "__main__":
+    bench_remotes(3)
+    bench_remotes(500)
@@ -0,0 +1,108 @@
+"""Micro-benchmarks for Ok / Err construction and memory usage.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_result.py
+"""
+
+from abc import ABC
+from dataclasses import dataclass
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Generic, List
+
+from bugyi.result import Err, Ok, ResultBatch
+from bugyi.types import E, T
+
+
+class _OldResultMixin(ABC, Generic[T, E]):
+    pass
+
+
+@dataclass(frozen=True)
+class _OldOk(_OldResultMixin[T, E]):
+    """The old (frozen dataclass) Ok implementation."""
+
+    _value: T
+
+    def unwrap(self) -> T:
+        return self._value
+
+
+@dataclass(frozen=True)
+class _OldErr(_OldResultMixin[T, E]):
+    """The old (frozen dataclass) Err implementation."""
+
+    _error: E
+
+
+def _bench(label: str, func: Callable[[], Any], number: int) -> float:
+    nsec = min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+    print(f"{label:<24} {nsec:>10.1f} nsec/op")
+    return nsec
+
+
+def _bytes_per_item(make: Callable[[int], Any], count: int) -> float:
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    items: List[Any] = [make(i) for i in range(count)]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+    del items
+    # Don't count the list itself.
+    return total / count - 8
+
+
+_SIZEOF = {Ok: sys.getsizeof(Ok(1)), Err: sys.getsizeof(Err(None))}
+
+
+def main() -> None:
+    number = 1_000_000
+    error = ValueError("benchmark error")
+    for label, old, new in [
+        ("Ok(1)", lambda: _OldOk(1), lambda: Ok(1)),
+        ("Ok(None)", lambda: _OldOk(None), lambda: Ok(None)),
+        ("Err(e)", lambda: _OldErr(error), lambda: Err(error)),
+    ]:
+        before = _bench(f"before  {label}", old, number)
+        after = _bench(f"after   {label}", new, number)
+        print(f"{'speedup':<24} {before / after:>10.1f}x\n")
+
+    count = 100_000
+    # Use values that are not cached by the interpreter.
+    values = [object() for _ in range(count)]
+    before = _bytes_per_item(lambda i: _OldOk(values[i]), count)
+    after = _bytes_per_item(lambda i: Ok(values[i]), count)
+    print(f"{'before  bytes/Ok':<24} {before:>10.1f}")
+    print(f"{'after   bytes/Ok':<24} {after:>10.1f}\n")
+
+    # Compare List[Result] against ResultBatch (with 1% errors).
+    errors = [ValueError(i) for i in range(count)]
+    results = [
+        Err(errors[i]) if i % 100 == 0 else Ok(values[i]) for i in range(count)
+    ]
+    for label, make in [
+        ("List[Result]", lambda: list(results)),
+        ("ResultBatch", lambda: ResultBatch.from_results(results)),
+    ]:
+        tracemalloc.start()
+        start = tracemalloc.take_snapshot()
+        container = make()
+        end = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        total = sum(
+            stat.size_diff for stat in end.compare_to(start, "filename")
+        )
+        # The Ok / Err objects in @results already exist, but a real
+        # List[Result] would own them.
+        if isinstance(container, list):
+            total += sum(_SIZEOF[type(r)] for r in container)
+        del container
+        print(f"{label:<24} {total / count:>10.1f} bytes/item")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Micro-benchmarks for running many small commands.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_subprocess.py
+"""
+
+import time
+from typing import Callable, List
+
+from bugyi import subprocess as bsp
+
+
+def _bench(label: str, popen: Callable, cmd: List[str], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        popen(cmd).unwrap()
+    usec = (time.perf_counter() - start) / number * 1e6
+    print(f"{label:<14} {' '.join(cmd):<16} {usec:>10.2f} usec/command")
+    return usec
+
+
+def main() -> None:
+    number = 2000
+    with bsp.ShellWorker() as worker:
+        for cmd in [["true"], ["echo", "foo"], ["/bin/true"]]:
+            before = _bench("safe_popen", bsp.safe_popen, cmd, number)
+            after = _bench("ShellWorker", worker.safe_popen, cmd, number)
+            print(
+                f"{'speedup':<14} {' '.join(cmd):<16} {before / after:>10.1f}x\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
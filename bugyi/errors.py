@@ -1,7 +1,29 @@
+import atexit
+import hashlib
+import importlib
+import marshal
+import pickle
+import threading
+import time
 import traceback
-from typing import Iterator, List, Optional
-
-from .io import efill, ewrap
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+import weakref
+import zlib
+
+from loguru import logger as log
+
+from .io import ewrap, iter_lines
 from .meta import Inspector, cname
 from .result import Err, Result
 from .types import E, T
@@ -11,6 +33,8 @@ BResult = Result[T, "BugyiError"]
 
 
 class BErr(Err[T, "BugyiError"]):
+    __slots__ = ()
+
     def __init__(self, emsg: str, cause: Exception = None, up: int = 0) -> None:
         e = BugyiError(emsg, cause=cause, up=up + 1)
         super().__init__(e)
@@ -24,8 +48,138 @@ class BugyiError(Exception):
         self.inspector = Inspector(up=up + 1)
         super().__init__(emsg)
 
+        # Maps report widths to (error chain, rendered report) tuples.
+        self._rendered: Dict[int, Tuple[List[Any], str]] = {}
+
     def __str__(self) -> str:
-        return str(self.report())
+        return self.render()
+
+    def __reduce__(
+        self,
+    ) -> Tuple[Callable[[bytes], "BugyiError"], Tuple[bytes]]:
+        # The default (pickle) implementation loses this error's causes and
+        # tracebacks.
+        return (BugyiError.from_bytes, (self.to_bytes(),))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            A dictionary that describes this error's entire chain of causes.
+            Any causes that are NOT BugyiError objects are stored as
+            preformatted traceback text. Everything is stored using builtin
+            types, except for any extra instance attributes (e.g. ones set by
+            a BugyiError subclass's __init__), which are stored as-is.
+        """
+        chain: List[Dict[str, Any]] = []
+        for e in self:
+            if isinstance(e, BugyiError):
+                chain.append(
+                    {
+                        "class": "{}:{}".format(
+                            type(e).__module__, type(e).__qualname__
+                        ),
+                        "message": Exception.__str__(e),
+                        "inspector": e.inspector.to_dict(),
+                        "attrs": {
+                            k: v
+                            for k, v in e.__dict__.items()
+                            if k not in _UNSERIALIZED_ATTRS
+                        },
+                    }
+                )
+            else:
+                chain.append(
+                    {
+                        "class": cname(e),
+                        "text": "\n".join(_iter_tb_or_repr_lines(e, 0)),
+                    }
+                )
+
+        return {"version": _SERIAL_VERSION, "chain": chain}
+
+    @classmethod
+    def from_dict(cls, error_dict: Dict[str, Any]) -> "BugyiError":
+        """Inverse of the to_dict() method."""
+        if error_dict.get("version") != _SERIAL_VERSION:
+            raise ValueError(
+                "Unsupported BugyiError serialization version: {!r}".format(
+                    error_dict.get("version")
+                )
+            )
+
+        cause: Optional[BaseException] = None
+        for entry in reversed(error_dict["chain"]):
+            e: BaseException
+            if "text" in entry:
+                e = SerializedError(entry["class"], entry["text"])
+            else:
+                error_cls = _import_error_class(entry["class"])
+                bugyi_error = error_cls.__new__(error_cls)
+                bugyi_error.args = (entry["message"],)
+                bugyi_error.inspector = Inspector.from_dict(entry["inspector"])
+                bugyi_error._rendered = {}
+                bugyi_error.__dict__.update(entry.get("attrs", {}))
+                e = bugyi_error
+
+            e.__cause__ = cause
+            cause = e
+
+        assert isinstance(cause, BugyiError), error_dict
+        return cause
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns:
+            A compact binary encoding of this error's entire chain of causes
+            (see to_dict()), which is suitable for sending to other processes.
+        """
+        chain: List[Tuple[Any, ...]] = []
+        for entry in self.to_dict()["chain"]:
+            if "text" in entry:
+                chain.append((entry["class"], entry["text"]))
+            else:
+                inspector = entry["inspector"]
+                # Extra attributes can hold anything, so we pickle them.
+                attrs = entry["attrs"]
+                chain.append(
+                    (
+                        entry["class"],
+                        entry["message"],
+                        *[inspector[k] for k in _INSPECTOR_KEYS],
+                        pickle.dumps(attrs) if attrs else None,
+                    )
+                )
+
+        data = marshal.dumps(tuple(chain))
+        if len(data) > 1024:
+            return bytes([_SERIAL_VERSION, 1]) + zlib.compress(data)
+        return bytes([_SERIAL_VERSION, 0]) + data
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BugyiError":
+        """Inverse of the to_bytes() method."""
+        version, compressed = data[0], data[1]
+        payload = data[2:]
+        if compressed:
+            payload = zlib.decompress(payload)
+
+        chain: List[Dict[str, Any]] = []
+        for entry in marshal.loads(payload):
+            if len(entry) == 2:
+                chain.append({"class": entry[0], "text": entry[1]})
+            else:
+                n = len(_INSPECTOR_KEYS)
+                raw_attrs = entry[2 + n] if len(entry) > 2 + n else None
+                chain.append(
+                    {
+                        "class": entry[0],
+                        "message": entry[1],
+                        "inspector": dict(zip(_INSPECTOR_KEYS, entry[2:])),
+                        "attrs": pickle.loads(raw_attrs) if raw_attrs else {},
+                    }
+                )
+
+        return cls.from_dict({"version": version, "chain": chain})
 
     def __repr__(self) -> str:
         return self._repr()
@@ -35,16 +189,44 @@ class BugyiError(Exception):
         Format error to width.  If width is None, return string suitable for
         traceback.
         """
+        return "\n".join(self._iter_repr_lines(width))
+
+    def _iter_repr_lines(self, width: int = 80) -> Iterator[str]:
         super_str = super().__str__()
 
-        emsg = efill(super_str, width, indent=2)
-        return "{}::{}::{}::{}{{\n{}\n}}".format(
+        yield "{}::{}::{}::{}{{".format(
             cname(self),
             self.inspector.module_name,
             self.inspector.function_name,
             self.inspector.line_number,
-            emsg,
         )
+        yield from ewrap(super_str, width, indent=2)
+        yield "}"
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Returns:
+            A short hex string that identifies where this error came from:
+            its class, the location it was created at, and the type of its
+            root cause. The error message is intentionally NOT used, since it
+            usually contains values that change on every occurrence.
+        """
+        *_, root = self
+        if isinstance(root, SerializedError):
+            root_type = root.class_name
+        else:
+            root_type = type(root).__qualname__
+
+        key = "{}:{}|{}|{}|{}|{}".format(
+            type(self).__module__,
+            type(self).__qualname__,
+            self.inspector.file_name,
+            self.inspector.function_name,
+            self.inspector.line_number,
+            root_type,
+        )
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
 
     def __iter__(self) -> Iterator[BaseException]:
         yield self
@@ -54,17 +236,65 @@ class BugyiError(Exception):
             yield e
             e = e.__cause__
 
+    def render(self, width: int = 80) -> str:
+        """
+        Returns:
+            The report returned by the report() method as a string.
+
+        Rendered reports are cached (per width) until this error's chain of
+        causes (or any error's arguments) changes.
+        """
+        # We hold onto the errors themselves (NOT their IDs, which can be
+        # reused once an error is freed) and compare them by identity.
+        chain: List[Any] = []
+        for e in self:
+            chain.append(e)
+            chain.append(e.args)
+
+        cached = self._rendered.get(width)
+        if cached is not None and _all_same(cached[0], chain):
+            return cached[1]
+
+        rendered = "\n" + "\n".join(self._iter_report_lines(width))
+        self._rendered[width] = (chain, rendered)
+        return rendered
+
+    def write_report(self, fp: IO[str], width: int = 80) -> None:
+        """
+        Writes the report returned by the report() method to @fp (one line at
+        a time, without ever building the full report in memory).
+        """
+        for line in self._iter_report_lines(width):
+            fp.write("\n")
+            fp.write(line)
+
     def report(self, width: int = 80) -> "_ErrorReport":
         """
         Return an _ErrorReport object formatting the current state of this
         BugyiError
         """
+        V_CH = "|"  # Vertical Character
+
+        report = _ErrorReport("\n", border_ch=V_CH)
+        last_line: Optional[str] = None
+        for line in self._iter_report_lines(width):
+            if last_line is not None:
+                report += last_line + "\n"
+            last_line = line
+
+        if last_line is not None:
+            report += last_line
+        return report
+
+    def _iter_report_lines(self, width: int = 80) -> Iterator[str]:
+        """Yields the (fully formatted) lines of this error's report."""
         TITLE = cname(self)
         MIDDLE_MSG = "was the direct cause of"
 
         H_CH = "-"  # Horizontal Character
         V_CH = "|"  # Vertical Character
         S_CH = "*"  # Special Character
+        C_CH = "+"  # Corner Character
 
         nleft_spaces, rem = divmod(width - len(TITLE), 2)
         if rem == 0:
@@ -92,22 +322,327 @@ class BugyiError(Exception):
         )
 
         dashes = "-" * len(header)
+        bar = _with_borders(dashes, V_CH)
 
-        # >>> Put everything together into a _ErrorReport object.
-        report = _ErrorReport("\n", border_ch=V_CH)
-        report += "{0}\n{1}\n{0}\n".format(dashes, header)
+        yield _with_borders(dashes, C_CH)
+        yield _with_borders(header, V_CH)
+        yield bar
         for i, error in enumerate(reversed(list(self))):
             w = width - 2
-            error_string = _tb_or_repr(error, width=w)
             if i != 0:
-                report += "{0}\n{1}\n{0}\n".format(dashes, middle_header)
+                yield bar
+                yield _with_borders(middle_header, V_CH)
+                yield bar
+
+            for line in _iter_tb_or_repr_lines(error, width=w):
+                for wrapped_line in ewrap(line, w):
+                    right_spaces = " " * (width - len(wrapped_line) - 2)
+                    yield "{0} {1}{2} {0}".format(
+                        V_CH, wrapped_line, right_spaces
+                    )
+
+        yield _with_borders(dashes, C_CH)
+
+
+class ErrorSummary(NamedTuple):
+    """Describes the errors that an ErrorAggregator did NOT fully report."""
+
+    fingerprint: str
+    suppressed: int
+    total: int
+    window: float
+    last_error: BugyiError
+
+
+ErrorReporter = Callable[[BugyiError], None]
+SummaryReporter = Callable[[ErrorSummary], None]
+
+
+def log_error_report(e: BugyiError) -> None:
+    """Default ErrorAggregator reporter: logs @e's full report."""
+    log.error("{}", e.render())
+
+
+def log_error_summary(summary: ErrorSummary) -> None:
+    """Default ErrorAggregator summary reporter."""
+    e = summary.last_error
+    log.warning(
+        "Suppressed {} more {} errors (total={}, fingerprint={}) from"
+        " {}::{}::{} in the last {:.1f}s. Last message: {!r}",
+        summary.suppressed,
+        cname(e),
+        summary.total,
+        summary.fingerprint,
+        e.inspector.module_name,
+        e.inspector.function_name,
+        e.inspector.line_number,
+        summary.window,
+        Exception.__str__(e),
+    )
+
+
+class _FingerprintState:
+    __slots__ = ("window_start", "count", "suppressed", "total", "last_error")
+
+    def __init__(self, window_start: float, e: BugyiError) -> None:
+        self.window_start = window_start
+        self.count = 0
+        self.suppressed = 0
+        self.total = 0
+        self.last_error = e
+
+
+class ErrorAggregator:
+    """Rate-limits error reports by BugyiError.fingerprint.
+
+    Only the first @limit errors with a given fingerprint are fully reported
+    in each @window. The rest are counted and then reported as a single
+    ErrorSummary once their window has elapsed (or flush() is called). This
+    means that the cost of reporting errors stays bounded, no matter how
+    often the same error is raised.
+
+    Summaries are reported by a background (daemon) thread, which is started
+    the first time an error is suppressed, so a burst of errors is still
+    summarized after it stops. Any summaries that are still pending when
+    the interpreter exits are reported then.
+
+    Args:
+        limit: The number of errors (per fingerprint, per window) to fully
+            report.
+        window: The length of each window (in seconds).
+        report: Called with every error that should be fully reported.
+        summarize: Called with an ErrorSummary for every window in which
+            errors were suppressed (possibly from the background thread).
+        clock: Returns the current time (in seconds).
+    """
 
-            for line in ewrap(error_string, w):
-                right_spaces = " " * (width - len(line) - 2)
-                report += "{0} {1}{2} {0}\n".format(V_CH, line, right_spaces)
+    def __init__(
+        self,
+        *,
+        limit: int = 5,
+        window: float = 60.0,
+        report: ErrorReporter = log_error_report,
+        summarize: SummaryReporter = log_error_summary,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = limit
+        self.window = window
+        self.report = report
+        self.summarize = summarize
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._states: Dict[str, _FingerprintState] = {}
+        self._next_sweep = clock() + window
+        self._stopped = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        _LIVE_AGGREGATORS.add(self)
+
+    def __enter__(self) -> "ErrorAggregator":
+        return self
 
-        report += dashes
-        return report
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def add(self, e: BugyiError) -> bool:
+        """Records @e and reports it if its fingerprint is under the limit.
+
+        Returns:
+            True if @e was fully reported.
+        """
+        fingerprint = e.fingerprint
+        now = self.clock()
+
+        summaries: List[ErrorSummary] = []
+        with self._lock:
+            if now >= self._next_sweep:
+                summaries.extend(self._sweep(now))
+                self._next_sweep = now + self.window
+
+            state = self._states.get(fingerprint)
+            if state is None:
+                state = _FingerprintState(now, e)
+                self._states[fingerprint] = state
+            elif now - state.window_start >= self.window:
+                summary = self._end_window(fingerprint, state, now)
+                if summary is not None:
+                    summaries.append(summary)
+
+            state.total += 1
+            state.last_error = e
+            if state.count < self.limit:
+                state.count += 1
+                should_report = True
+            else:
+                state.suppressed += 1
+                should_report = False
+                if self._sweeper is None and not self._stopped.is_set():
+                    self._start_sweeper()
+
+        for summary in summaries:
+            self.summarize(summary)
+
+        if should_report:
+            self.report(e)
+        return should_report
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Returns:
+            A dictionary mapping every fingerprint seen so far to the total
+            number of errors that had that fingerprint.
+        """
+        with self._lock:
+            return {fp: state.total for fp, state in self._states.items()}
+
+    def flush(self) -> None:
+        """Summarizes any suppressed errors NOW (even if their window is
+        still open)."""
+        with self._lock:
+            summaries = self._sweep(self.clock(), force=True)
+
+        for summary in summaries:
+            self.summarize(summary)
+
+    def close(self) -> None:
+        """Stops the background thread and summarizes any suppressed
+        errors."""
+        self._stopped.set()
+        self.flush()
+
+    def _start_sweeper(self) -> None:
+        # The thread only holds a weak reference, so that it doesn't keep
+        # this aggregator alive.
+        self._sweeper = threading.Thread(
+            target=_sweep_in_background,
+            args=(weakref.ref(self), self._stopped, self.window),
+            name="ErrorAggregator",
+            daemon=True,
+        )
+        self._sweeper.start()
+
+    def _sweep_expired(self) -> float:
+        """Summarizes every window that has elapsed.
+
+        Returns:
+            The number of seconds until the next window that has suppressed
+            errors elapses.
+        """
+        now = self.clock()
+        with self._lock:
+            summaries = self._sweep(now)
+            ends = [
+                state.window_start + self.window
+                for state in self._states.values()
+                if state.suppressed
+            ]
+
+        for summary in summaries:
+            self.summarize(summary)
+        return max(min(ends, default=now + self.window) - now, 0.0)
+
+    def _sweep(self, now: float, *, force: bool = False) -> List[ErrorSummary]:
+        summaries = []
+        for fp, state in self._states.items():
+            if force or now - state.window_start >= self.window:
+                summary = self._end_window(fp, state, now)
+                if summary is not None:
+                    summaries.append(summary)
+        return summaries
+
+    def _end_window(
+        self, fingerprint: str, state: _FingerprintState, now: float
+    ) -> Optional[ErrorSummary]:
+        summary = None
+        if state.suppressed:
+            summary = ErrorSummary(
+                fingerprint,
+                state.suppressed,
+                state.total,
+                now - state.window_start,
+                state.last_error,
+            )
+
+        state.window_start = now
+        state.count = 0
+        state.suppressed = 0
+        return summary
+
+
+_LIVE_AGGREGATORS: "weakref.WeakSet[ErrorAggregator]" = weakref.WeakSet()
+
+
+def _sweep_in_background(
+    ref: "weakref.ref[ErrorAggregator]",
+    stopped: threading.Event,
+    timeout: float,
+) -> None:
+    while not stopped.wait(timeout):
+        aggregator = ref()
+        if aggregator is None:
+            return
+        timeout = aggregator._sweep_expired()
+        del aggregator
+
+
+@atexit.register
+def _flush_aggregators() -> None:
+    for aggregator in list(_LIVE_AGGREGATORS):
+        aggregator.flush()
+
+
+def _all_same(xs: List[Any], ys: List[Any]) -> bool:
+    return len(xs) == len(ys) and all(x is y for x, y in zip(xs, ys))
+
+
+def _with_borders(line: str, border_ch: str) -> str:
+    return border_ch + line[1:-1] + border_ch
+
+
+class SerializedError(Exception):
+    """
+    Stands in for an exception (that was NOT a BugyiError) in an error chain
+    that was rebuilt by BugyiError.from_dict() / BugyiError.from_bytes().
+
+    Attributes:
+        class_name: The name of the original exception's class.
+        text: The original exception's (preformatted) traceback.
+    """
+
+    def __init__(self, class_name: str, text: str) -> None:
+        super().__init__(class_name, text)
+        self.class_name = class_name
+        self.text = text
+
+
+_SERIAL_VERSION = 1
+# BugyiError instance attributes that to_dict() handles explicitly (or not
+# at all).
+_UNSERIALIZED_ATTRS = frozenset(["inspector", "_rendered"])
+_INSPECTOR_KEYS = (
+    "file_name",
+    "function_name",
+    "line_number",
+    "module_name",
+    "lines",
+)
+
+
+def _import_error_class(class_path: str) -> Type[BugyiError]:
+    module_name, _, qualname = class_path.partition(":")
+    try:
+        obj: Any = importlib.import_module(module_name)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+    except (ImportError, AttributeError):
+        obj = None
+
+    if isinstance(obj, type) and issubclass(obj, BugyiError):
+        return obj
+
+    # We still want the error report to show the right class name.
+    class_name = qualname.rpartition(".")[2]
+    return type(class_name, (BugyiError,), {})
 
 
 class _ErrorReport:
@@ -143,12 +678,12 @@ class _ErrorReport:
                 self.report_lines.append(rline)
 
     def _close_borders(self) -> None:
-        for i, rline in enumerate(self.report_lines[:]):
+        for rline in self.report_lines:
             V_CH = self.border_ch
             if not rline.line:
                 continue
 
-            self.report_lines[i].line = V_CH + rline.line[1:-1] + V_CH
+            rline.line = V_CH + rline.line[1:-1] + V_CH
 
         V_CH = "+"  # report box corners
         for i, inc in [(0, 1), (-1, -1)]:
@@ -174,16 +709,18 @@ class _ErrorReportLine:
         )
 
 
-def _tb_or_repr(e: BaseException, width: int) -> str:
+def _iter_tb_or_repr_lines(e: BaseException, width: int) -> Iterator[str]:
     if isinstance(e, BugyiError):
-        return e._repr(width=width)
+        yield from e._iter_repr_lines(width=width)
+    elif isinstance(e, SerializedError):
+        yield from iter_lines(e.text)
     else:
         tb = getattr(e, "__traceback__", None)
         if tb is not None:
             estring = "".join(traceback.format_exception(type(e), e, tb))
         else:
             estring = repr(e)
-        return estring
+        yield from iter_lines(estring)
 
 
 def chain_errors(e1: E, e2: Optional[Exception]) -> E:
@@ -1,9 +1,251 @@
+import os
+import re
+import subprocess as sp
 import sys
-from typing import Iterable, List, NamedTuple
+import time
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
-from . import subprocess as bsp
-from .errors import BResult, BErr
+from . import subprocess as bsp  # pylint: disable=reimported
+from .errors import BErr, BResult, BugyiError
 from .result import Err, Ok
+from .types import Literal, PathLike, T
+
+
+# If any of these environment variables are set, git's repository discovery
+# rules change and we always fall back to running git.
+_GIT_DISCOVERY_ENV_VARS = (
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_COMMON_DIR",
+    "GIT_CEILING_DIRECTORIES",
+    "GIT_DISCOVERY_ACROSS_FILESYSTEM",
+)
+
+
+class GitPaths(NamedTuple):
+    """The locations that make up a (non-bare) git repository.
+
+    Attributes:
+        work_tree: The top-level directory of the working tree.
+        git_dir: The .git directory (or the worktree-specific directory under
+            .git/worktrees/ for linked worktrees).
+        common_dir: The directory containing the refs, packed-refs, config,
+            and objects that are shared by all worktrees.
+    """
+
+    work_tree: str
+    git_dir: str
+    common_dir: str
+
+
+def discover_repo(cwd: str = None) -> Optional[GitPaths]:
+    """Discovers the git repository containing @cwd without running git.
+
+    Returns:
+        A GitPaths object or None if no repository was found OR we ran into
+        anything unusual (in which case callers should fall back to running
+        git).
+    """
+    if any(var in os.environ for var in _GIT_DISCOVERY_ENV_VARS):
+        return None
+
+    path = os.path.realpath(os.getcwd() if cwd is None else cwd)
+    if ".git" in path.split(os.sep):
+        return None
+
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            git_dir = dot_git
+            break
+
+        if os.path.isfile(dot_git):
+            gitdir_line = _read_first_line(dot_git)
+            if gitdir_line is None or not gitdir_line.startswith("gitdir: "):
+                return None
+
+            git_dir = os.path.realpath(
+                os.path.join(path, gitdir_line[len("gitdir: ") :])
+            )
+            break
+
+        # Like git, we treat any directory that looks like a git directory
+        # as one (e.g. a bare repository), even if it is nested inside of
+        # another repository's working tree.
+        if _is_git_dir(path):
+            return None
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+    common_dir = git_dir
+    commondir_line = _read_first_line(os.path.join(git_dir, "commondir"))
+    if commondir_line is not None:
+        common_dir = os.path.realpath(os.path.join(git_dir, commondir_line))
+
+    if not os.path.isfile(os.path.join(git_dir, "HEAD")):
+        return None
+
+    # We do not support the reftable ref storage format.
+    if os.path.exists(os.path.join(common_dir, "reftable")):
+        return None
+
+    if not _is_plain_repo_config(os.path.join(common_dir, "config")):
+        return None
+
+    return GitPaths(path, git_dir, common_dir)
+
+
+def _is_git_dir(path: str) -> bool:
+    return (
+        os.path.isfile(os.path.join(path, "HEAD"))
+        and os.path.isdir(os.path.join(path, "objects"))
+        and os.path.isdir(os.path.join(path, "refs"))
+    )
+
+
+def _is_plain_repo_config(config_file: str, *, depth: int = 0) -> bool:
+    """
+    Returns:
+        False if the repository config in @config_file (or any file it
+        includes) sets any option that changes what the top-level directory
+        is (e.g. core.worktree or core.bare) OR uses any syntax we do not
+        support.
+    """
+    if depth > _MAX_CONFIG_INCLUDE_DEPTH:
+        return False
+
+    try:
+        with open(config_file) as f:
+            text = f.read()
+    except FileNotFoundError:
+        # git ignores missing include files.
+        return depth > 0
+    except (OSError, UnicodeDecodeError):
+        return False
+
+    # We do not support line continuations.
+    if "\\\n" in text:
+        return False
+
+    section: Optional[str] = None
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+
+        if line.startswith("["):
+            section_match = _CONFIG_SECTION_RE.match(line)
+            if section_match is None:
+                return False
+
+            section = section_match.group(1).lower()
+            if section == "includeif":
+                return False
+            continue
+
+        if section not in ["core", "extensions", "include"]:
+            continue
+
+        raw_key, eq, raw_value = line.partition("=")
+        key = raw_key.rstrip().lower()
+        value = _parse_config_value(raw_value) if eq else None
+        if section == "include":
+            if key != "path":
+                continue
+            if value is None:
+                return False
+
+            include_path = os.path.join(
+                os.path.dirname(config_file), os.path.expanduser(value)
+            )
+            if not _is_plain_repo_config(include_path, depth=depth + 1):
+                return False
+        elif section == "extensions":
+            # Per-worktree config files could set any of these options.
+            if key == "worktreeconfig":
+                return False
+        elif key == "worktree":
+            return False
+        elif key == "bare":
+            # A key without a value is true.
+            if not eq:
+                return False
+            if value is None or value.lower() not in _CONFIG_FALSE_VALUES:
+                return False
+
+    return True
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.readline().rstrip("\n")
+    except OSError:
+        return None
+
+
+def _read_current_branch(paths: GitPaths) -> Optional[str]:
+    """
+    Returns:
+        The current branch ("" if HEAD is detached) or None if HEAD could not
+        be parsed.
+    """
+    head = _read_first_line(os.path.join(paths.git_dir, "HEAD"))
+    if head is None:
+        return None
+
+    if head.startswith("ref: refs/heads/"):
+        return head[len("ref: refs/heads/") :]
+
+    if not head.startswith("ref: ") and len(head) in (40, 64):
+        return ""
+
+    return None
+
+
+def _read_local_branch_exists(paths: GitPaths, branch: str) -> Optional[bool]:
+    """
+    Returns:
+        Whether or not @branch exists or None if we are not sure.
+    """
+    if (
+        not branch
+        or branch.startswith(("-", "/"))
+        or ".." in branch
+        or any(ch in branch for ch in "*?[\\")
+    ):
+        return None
+
+    ref = "refs/heads/" + branch
+    if os.path.isfile(os.path.join(paths.common_dir, ref)):
+        return True
+
+    try:
+        with open(os.path.join(paths.common_dir, "packed-refs")) as f:
+            for line in f:
+                if line.rstrip("\n").endswith(" " + ref):
+                    return True
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return None
+
+    return False
 
 
 def top_level_dir(cwd: str = None) -> BResult[str]:
@@ -11,6 +253,10 @@ def top_level_dir(cwd: str = None) -> BResult[str]:
     Returns:
         The full path of top-level directory which contains the .git directory.
     """
+    paths = discover_repo(cwd)
+    if paths is not None:
+        return Ok(paths.work_tree)
+
     out_err_r = bsp.safe_popen(
         ["git", "rev-parse", "--show-toplevel"], cwd=cwd
     )
@@ -29,9 +275,23 @@ class GitRemote(NamedTuple):
     url: str
 
 
-def remotes() -> BResult[List[GitRemote]]:
-    """Python wrapper around the `git remote -v` command."""
-    out_err_r = bsp.safe_popen(["git", "remote", "-v"])
+def remotes(cwd: str = None) -> BResult[List[GitRemote]]:
+    """Python wrapper around the `git remote -v` command.
+
+    When possible, the remotes are read directly from the git config files
+    (without running git).
+    """
+    paths = discover_repo(cwd)
+    if paths is not None:
+        config_remotes = _read_config_remotes(paths)
+        if config_remotes is not None:
+            return Ok(config_remotes)
+
+    return _git_remotes(cwd)
+
+
+def _git_remotes(cwd: str = None) -> BResult[List[GitRemote]]:
+    out_err_r = bsp.safe_popen(["git", "remote", "-v"], cwd=cwd)
     if isinstance(out_err_r, Err):
         return BErr(
             "Failed to retrieve a list of git remotes.", cause=out_err_r.err()
@@ -39,20 +299,408 @@ def remotes() -> BResult[List[GitRemote]]:
 
     out, _err = out_err_r.ok()
 
-    all_remotes = []
+    # We use a dict (instead of a set) to preserve the order of the remotes.
+    all_remotes: Dict[GitRemote, None] = {}
     for line in out.split("\n"):
         line_split = line.split()
         if len(line_split) < 2:
             continue
 
         remote = GitRemote(str(line_split[0]), str(line_split[1]))
-        if remote not in all_remotes:
-            all_remotes.append(remote)
+        all_remotes[remote] = None
+
+    return Ok(list(all_remotes))
+
+
+# If any of these environment variables are set, git may read config values
+# from somewhere other than the usual config files.
+_GIT_CONFIG_ENV_VARS = (
+    "GIT_CONFIG",
+    "GIT_CONFIG_COUNT",
+    "GIT_CONFIG_GLOBAL",
+    "GIT_CONFIG_NOSYSTEM",
+    "GIT_CONFIG_PARAMETERS",
+    "GIT_CONFIG_SYSTEM",
+)
+
+_CONFIG_SECTION_RE = re.compile(
+    r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"([^"\\]*(?:\\.[^"\\]*)*)")?\s*\]\s*$'
+)
+_CONFIG_SPECIAL_CHARS_RE = re.compile(r'["\\#;]')
+_CONFIG_FALSE_VALUES = ("false", "no", "off", "0", "")
+
+# The maximum include.path depth (git uses the same limit).
+_MAX_CONFIG_INCLUDE_DEPTH = 10
+
+
+class _RemoteURLs(NamedTuple):
+    urls: List[str]
+    pushurls: List[str]
+
+
+def _read_config_remotes(
+    paths: GitPaths, read_files: List[str] = None
+) -> Optional[List[GitRemote]]:
+    """Emulates `git remote -v` by reading the git config files directly.
+
+    Returns:
+        The same remotes that remotes() returns or None if we ran into
+        anything that we do not support (in which case callers should fall
+        back to running git).
+
+    Args:
+        paths: The repository's paths.
+        read_files (opt): The path of every config file that we try to read
+            (including any include.path files) is appended to this list.
+    """
+    if any(var in os.environ for var in _GIT_CONFIG_ENV_VARS):
+        return None
+
+    # Remotes can also be defined using these (legacy) directories.
+    for legacy_dir in ["remotes", "branches"]:
+        legacy_path = os.path.join(paths.common_dir, legacy_dir)
+        if os.path.isdir(legacy_path) and os.listdir(legacy_path):
+            return None
+
+    if os.path.exists(os.path.join(paths.git_dir, "config.worktree")):
+        return None
+
+    remote_urls: Dict[str, _RemoteURLs] = {}
+    for config_file in _config_files(paths):
+        if not _parse_config_remotes(
+            config_file, remote_urls, depth=0, read_files=read_files
+        ):
+            return None
+
+    # We use a dict (instead of a set) to preserve the order of the remotes.
+    all_remotes: Dict[GitRemote, None] = {}
+    for name, (urls, pushurls) in sorted(remote_urls.items()):
+        if not urls:
+            return None
+
+        all_remotes[GitRemote(name, urls[0])] = None
+        for url in pushurls or urls:
+            all_remotes[GitRemote(name, url)] = None
+
+    return list(all_remotes)
+
+
+def _config_files(paths: GitPaths) -> List[str]:
+    """
+    Returns:
+        The system, global, and repository config files (in the order that
+        git reads them).
+    """
+    xdg_config_home = os.environ.get(
+        "XDG_CONFIG_HOME", os.path.expanduser("~/.config")
+    )
+    return [
+        "/etc/gitconfig",
+        os.path.join(xdg_config_home, "git", "config"),
+        os.path.expanduser("~/.gitconfig"),
+        os.path.join(paths.common_dir, "config"),
+    ]
+
+
+def _parse_config_remotes(
+    config_file: str,
+    remote_urls: Dict[str, _RemoteURLs],
+    *,
+    depth: int,
+    read_files: List[str] = None,
+) -> bool:
+    """Collects the remote URLs defined in @config_file into @remote_urls.
+
+    Returns:
+        False iff @config_file contains something we do not support.
+    """
+    if depth > _MAX_CONFIG_INCLUDE_DEPTH:
+        return False
+
+    if read_files is not None:
+        read_files.append(config_file)
+
+    try:
+        with open(config_file) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return True
+    except (OSError, UnicodeDecodeError):
+        return False
+
+    # We do not support line continuations.
+    if "\\\n" in text:
+        return False
+
+    section: Optional[str] = None
+    subsection: Optional[str] = None
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+
+        if line.startswith("["):
+            section_match = _CONFIG_SECTION_RE.match(line)
+            if section_match is None:
+                return False
+
+            section = section_match.group(1).lower()
+            subsection = section_match.group(2)
+            if section in ["includeif", "url"] or section.startswith(
+                "remote."
+            ):
+                return False
+            continue
+
+        if section != "remote" and section != "include":
+            continue
+
+        raw_key, eq, raw_value_or_empty = line.partition("=")
+        key = raw_key.rstrip().lower()
+        if not key.replace("-", "").isalnum():
+            return False
+
+        raw_value = raw_value_or_empty if eq else None
+        if section == "remote" and key in ["url", "pushurl"]:
+            if subsection is None or raw_value is None:
+                return False
+
+            value = _parse_config_value(raw_value)
+            if value is None:
+                return False
+
+            urls = remote_urls.setdefault(subsection, _RemoteURLs([], []))
+            (urls.urls if key == "url" else urls.pushurls).append(value)
+        elif section == "include" and key == "path":
+            if raw_value is None:
+                return False
+
+            include_path = _parse_config_value(raw_value)
+            if include_path is None:
+                return False
+
+            include_path = os.path.join(
+                os.path.dirname(config_file),
+                os.path.expanduser(include_path),
+            )
+            if not _parse_config_remotes(
+                include_path,
+                remote_urls,
+                depth=depth + 1,
+                read_files=read_files,
+            ):
+                return False
+
+    return True
+
+
+def _parse_config_value(raw_value: str) -> Optional[str]:
+    """
+    Returns:
+        The unquoted / unescaped config value (with comments removed) or
+        None if @raw_value uses syntax we do not support.
+    """
+    # Fast path: Most values do not use any special syntax.
+    if not _CONFIG_SPECIAL_CHARS_RE.search(raw_value):
+        return raw_value.strip()
+
+    value_chars: List[str] = []
+    pending_ws = ""
+    in_quotes = False
+    chars = iter(raw_value.strip())
+    for ch in chars:
+        if ch == "\\":
+            escaped = next(chars, None)
+            if escaped is None or escaped not in '"\\ntb':
+                return None
+            value_chars.append(pending_ws)
+            pending_ws = ""
+            value_chars.append(
+                {"n": "\n", "t": "\t", "b": "\b"}.get(escaped, escaped)
+            )
+        elif ch == '"':
+            in_quotes = not in_quotes
+        elif ch in "#;" and not in_quotes:
+            break
+        elif ch.isspace() and not in_quotes:
+            pending_ws += ch
+        else:
+            value_chars.append(pending_ws)
+            pending_ws = ""
+            value_chars.append(ch)
+
+    if in_quotes:
+        return None
+
+    return "".join(value_chars)
+
+
+class GitCommit(NamedTuple):
+    """A git commit, as yielded by iter_commits().
+
+    Fields that were not requested (see the @fields argument of
+    iter_commits()) are set to None.
+    """
+
+    oid: str
+    parents: Optional[Tuple[str, ...]] = None
+    author_name: Optional[str] = None
+    author_email: Optional[str] = None
+    author_time: Optional[int] = None
+    committer_name: Optional[str] = None
+    committer_email: Optional[str] = None
+    commit_time: Optional[int] = None
+    subject: Optional[str] = None
+    body: Optional[str] = None
+
+
+# Maps GitCommit fields to `git log --format` placeholders.
+_COMMIT_FORMATS: Dict[str, str] = {
+    "oid": "%H",
+    "parents": "%P",
+    "author_name": "%an",
+    "author_email": "%ae",
+    "author_time": "%at",
+    "committer_name": "%cn",
+    "committer_email": "%ce",
+    "commit_time": "%ct",
+    "subject": "%s",
+    "body": "%b",
+}
+
 
-    return Ok(all_remotes)
+def iter_commits(
+    rev_range: str = "HEAD",
+    *,
+    fields: Iterable[str] = GitCommit._fields,
+    cwd: str = None,
+) -> Iterator[GitCommit]:
+    """Streams the commits in @rev_range (one GitCommit at a time).
+
+    Commits are parsed as they are read from `git log`, so memory usage
+    stays constant no matter how many commits there are.
+
+    Args:
+        rev_range: Any revision range accepted by `git log`.
+        fields: The GitCommit fields to populate (the 'oid' field is always
+            populated).
+
+    Raises:
+        BugyiError: If the `git log` command fails.
+    """
+    field_list = ["oid"] + [f for f in fields if f != "oid"]
+    for field in field_list:
+        if field not in _COMMIT_FORMATS:
+            raise ValueError(f"Invalid GitCommit field: {field!r}")
+
+    # NOTE: The -z option ends every commit with a NUL byte, so every
+    # commit contributes exactly len(field_list) NUL-delimited records.
+    fmt = "%x00".join(_COMMIT_FORMATS[f] for f in field_list)
+    cmd_list = [
+        "git",
+        "log",
+        "-z",
+        "--no-color",
+        "--no-show-signature",
+        f"--format={fmt}",
+        rev_range,
+        "--",
+    ]
+
+    # File paths (and commit metadata) need not be valid UTF-8.
+    with bsp.stream_popen(cmd_list, cwd=cwd, errors="surrogateescape") as proc:
+        values: List[str] = []
+        for record in proc.records(b"\0"):
+            values.append(record)
+            if len(values) == len(field_list):
+                yield _make_commit(field_list, values)
+                values = []
+
+        proc.result(up=1).unwrap()
+
+
+def _make_commit(field_list: List[str], values: List[str]) -> GitCommit:
+    kwargs: Dict[str, Any] = {}
+    for field, value in zip(field_list, values):
+        if field == "parents":
+            kwargs[field] = tuple(value.split())
+        elif field in ["author_time", "commit_time"]:
+            kwargs[field] = int(value)
+        elif field == "body":
+            kwargs[field] = value.rstrip("\n")
+        else:
+            kwargs[field] = value
+    return GitCommit(**kwargs)
+
+
+class GitStatusEntry(NamedTuple):
+    """A single entry of `git status --porcelain=v2` output.
+
+    Attributes:
+        kind: One of 'changed', 'renamed', 'unmerged', 'untracked', or
+            'ignored'.
+        xy: The two-character status code (e.g. '.M' or 'A.'). Untracked and
+            ignored files use '??' and '!!', respectively.
+        path: The file's path (relative to the top-level directory). Bytes
+            that are not valid UTF-8 are decoded using the "surrogateescape"
+            error handler, so os.fsencode() returns the original path.
+        orig_path: The file's original path (only set for renamed / copied
+            files).
+    """
+
+    kind: str
+    xy: str
+    path: str
+    orig_path: Optional[str] = None
+
+
+def status(
+    *, untracked: bool = True, ignored: bool = False, cwd: str = None
+) -> Iterator[GitStatusEntry]:
+    """Streams the working tree's status (one GitStatusEntry at a time).
+
+    Raises:
+        BugyiError: If the `git status` command fails.
+    """
+    cmd_list = [
+        "git",
+        "status",
+        "--porcelain=v2",
+        "-z",
+        "--untracked-files={}".format("all" if untracked else "no"),
+        "--ignored={}".format("traditional" if ignored else "no"),
+    ]
+
+    # File paths (and commit metadata) need not be valid UTF-8.
+    with bsp.stream_popen(cmd_list, cwd=cwd, errors="surrogateescape") as proc:
+        records = proc.records(b"\0")
+        for record in records:
+            kind_ch = record[:1]
+            if kind_ch == "1":
+                parts = record.split(" ", 8)
+                yield GitStatusEntry("changed", parts[1], parts[8])
+            elif kind_ch == "2":
+                parts = record.split(" ", 9)
+                orig_path = next(records)
+                yield GitStatusEntry("renamed", parts[1], parts[9], orig_path)
+            elif kind_ch == "u":
+                parts = record.split(" ", 10)
+                yield GitStatusEntry("unmerged", parts[1], parts[10])
+            elif kind_ch == "?":
+                yield GitStatusEntry("untracked", "??", record[2:])
+            elif kind_ch == "!":
+                yield GitStatusEntry("ignored", "!!", record[2:])
+
+        proc.result(up=1).unwrap()
 
 
 def local_branch_exists(branch: str) -> BResult[bool]:
+    paths = discover_repo()
+    if paths is not None:
+        exists = _read_local_branch_exists(paths, branch)
+        if exists is not None:
+            return Ok(exists)
+
     return _branch_exists(["git", "branch", "--list", branch])
 
 
@@ -60,6 +708,54 @@ def remote_branch_exists(remote: str, branch: str) -> BResult[bool]:
     return _branch_exists(["git", "ls-remote", "--heads", remote, branch])
 
 
+# Maps (cwd, remote) pairs to (timestamp, remote branch names) tuples.
+_REMOTE_HEADS_CACHE: Dict[Tuple[str, str], Tuple[float, FrozenSet[str]]] = {}
+
+
+def remote_branches_exist(
+    remote: str, branches: Iterable[str], *, ttl: float = 60
+) -> BResult[Dict[str, bool]]:
+    """Batch version of remote_branch_exists().
+
+    A single `git ls-remote --heads` call is used to check all of the
+    given branches. The remote's branches are then cached for @ttl seconds.
+
+    Returns:
+        A dictionary mapping each branch in @branches to whether or not that
+        branch exists on @remote.
+    """
+    heads_r = _remote_heads(remote, ttl=ttl)
+    if isinstance(heads_r, Err):
+        return BErr(
+            f"Unable to determine which branches exist on the {remote!r}"
+            " remote.",
+            cause=heads_r.err(),
+        )
+
+    heads = heads_r.ok()
+    return Ok({branch: branch in heads for branch in branches})
+
+
+def _remote_heads(remote: str, *, ttl: float) -> BResult[FrozenSet[str]]:
+    key = (os.getcwd(), remote)
+    cached = _REMOTE_HEADS_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return Ok(cached[1])
+
+    out_err_r = bsp.safe_popen(["git", "ls-remote", "--heads", remote])
+    if isinstance(out_err_r, Err):
+        return Err(out_err_r.err())
+
+    out, _err = out_err_r.ok()
+    heads = frozenset(
+        line.split("\trefs/heads/", 1)[1]
+        for line in out.split("\n")
+        if "\trefs/heads/" in line
+    )
+    _REMOTE_HEADS_CACHE[key] = (time.monotonic(), heads)
+    return Ok(heads)
+
+
 def _branch_exists(cmd_parts: Iterable[str]) -> BResult[bool]:
     out_err_r = bsp.safe_popen(list(cmd_parts))
     if isinstance(out_err_r, Err):
@@ -103,6 +799,72 @@ def fetch(remote: str = None) -> BResult[None]:
     return _git_cmd("fetch", *opts)
 
 
+SyncOp = Literal["fetch", "pull"]
+
+
+class SyncResults(NamedTuple):
+    """The return value of sync_repos().
+
+    Attributes:
+        results: Maps each repository path to Ok((out, err)) (the output of
+            the git command run in that repository) or Err(BugyiError).
+        stats: Timing statistics for the sync as a whole.
+    """
+
+    results: Dict[str, BResult[Tuple[str, str]]]
+    stats: bsp.BatchStats
+
+
+def sync_repos(
+    paths: Iterable[PathLike],
+    op: SyncOp = "fetch",
+    *,
+    max_concurrency: int = 8,
+) -> SyncResults:
+    """Fetches (or pulls) many git repositories in parallel.
+
+    Unlike fetch() and pull(), the output of each git command is captured
+    (per repository) instead of being written to STDOUT.
+
+    Args:
+        paths: The repositories to sync.
+        op: The git command to run in each repository.
+        max_concurrency: Maximum number of git commands to run at once.
+    """
+    if op == "fetch":
+        cmd_list = ["git", "fetch", "--all"]
+    elif op == "pull":
+        cmd_list = ["git", "pull"]
+    else:
+        raise ValueError(f"Invalid git sync operation: {op!r}")
+
+    repo_paths = [str(path) for path in paths]
+
+    # Git must never block waiting for credentials that nobody will enter.
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    batch = bsp.run_many(
+        [bsp.Command(cmd_list, cwd=path) for path in repo_paths],
+        max_workers=max_concurrency,
+        env=env,
+        stdin=sp.DEVNULL,
+    )
+
+    # NOTE: The batch's stats are only populated once it is exhausted.
+    out_err_rs = list(batch)
+
+    results: Dict[str, BResult[Tuple[str, str]]] = {}
+    for path, out_err_r in zip(repo_paths, out_err_rs):
+        if isinstance(out_err_r, Err):
+            results[path] = BErr(
+                f"Failed to {op} the git repository at {path}.",
+                cause=out_err_r.err(),
+            )
+        else:
+            results[path] = out_err_r
+
+    return SyncResults(results, batch.stats)
+
+
 def add_remote(name: str, url: str) -> BResult[None]:
     return _git_cmd("remote", "add", name, url)
 
@@ -118,8 +880,16 @@ def _git_cmd(cmd: str, *opts: str) -> BResult[None]:
     return Ok(None)
 
 
-def current_branch() -> BResult[str]:
-    this_branch_r = bsp.safe_popen(["git", "branch", "--show-current"])
+def current_branch(cwd: str = None) -> BResult[str]:
+    paths = discover_repo(cwd)
+    if paths is not None:
+        branch = _read_current_branch(paths)
+        if branch is not None:
+            return Ok(branch)
+
+    this_branch_r = bsp.safe_popen(
+        ["git", "branch", "--show-current"], cwd=cwd
+    )
     if isinstance(this_branch_r, Err):
         return BErr(
             "Unable to determine the current git branch.",
@@ -128,3 +898,340 @@ def current_branch() -> BResult[str]:
 
     this_branch, _ = this_branch_r.ok()
     return Ok(this_branch)
+
+
+class GitObjectInfo(NamedTuple):
+    oid: str
+    type: str
+    size: int
+
+
+class GitBatchSession:
+    """Persistent `git cat-file --batch-check` / `--batch` session.
+
+    Thousands of object lookups cost a single git process startup (per
+    mode), since every lookup is sent to the same long-lived git process.
+
+    Examples:
+        with GitBatchSession() as session:
+            for info_r in session.infos(revs):
+                ...
+    """
+
+    # The number of requests we write before reading any responses back.
+    # This needs to be small enough that neither the request nor the
+    # response pipe's buffer can fill up (which would deadlock us).
+    PIPELINE_DEPTH = 256
+
+    def __init__(self, cwd: str = None) -> None:
+        self.cwd = cwd
+        self._check_ps: Optional[sp.Popen] = None
+        self._batch_ps: Optional[sp.Popen] = None
+
+        # The number of `--batch-check` responses that have not been read yet
+        # and the ID of the request that they belong to.
+        self._check_pending = 0
+        self._check_request_id = 0
+
+    def __enter__(self) -> "GitBatchSession":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        self.close()
+
+    def info(self, rev: str) -> BResult[GitObjectInfo]:
+        """
+        Returns:
+            The object ID, type, and size of the object named by @rev.
+        """
+        return next(self.infos([rev]))
+
+    def infos(self, revs: Iterable[str]) -> Iterator[BResult[GitObjectInfo]]:
+        """Pipelined version of info()."""
+        revs = iter(revs)
+        while True:
+            chunk = [rev for _, rev in zip(range(self.PIPELINE_DEPTH), revs)]
+            if not chunk:
+                return
+
+            ps_r = self._request("--batch-check", chunk)
+            if isinstance(ps_r, Err):
+                for _ in chunk:
+                    yield Err(ps_r.err())
+                continue
+
+            ps = ps_r.ok()
+            assert ps.stdout is not None
+            request_id = self._check_request_id
+            try:
+                for rev in chunk:
+                    if self._check_request_id != request_id:
+                        yield BErr(
+                            f"The lookup of {rev!r} was interrupted by a"
+                            " newer GitBatchSession request."
+                        )
+                        continue
+
+                    self._check_pending -= 1
+                    yield _parse_object_info(rev, ps.stdout.readline())
+            finally:
+                # Unread responses (e.g. if the caller stopped iterating
+                # early) would otherwise be read by the next request.
+                if self._check_request_id == request_id:
+                    self._drain_check_responses()
+
+    def exists(self, rev: str) -> BResult[bool]:
+        """
+        Returns:
+            Ok(True) iff @rev names an object that exists.
+        """
+        info_r = self.info(rev)
+        if isinstance(info_r, Err):
+            if isinstance(info_r.err(), _MissingObjectError):
+                return Ok(False)
+            return Err(info_r.err())
+        return Ok(True)
+
+    def read(self, rev: str) -> BResult[Tuple[GitObjectInfo, bytes]]:
+        """
+        Returns:
+            The info and contents of the object named by @rev.
+        """
+        ps_r = self._request("--batch", [rev])
+        if isinstance(ps_r, Err):
+            return Err(ps_r.err())
+
+        ps = ps_r.ok()
+        assert ps.stdout is not None
+        info_r = _parse_object_info(rev, ps.stdout.readline())
+        if isinstance(info_r, Err):
+            return Err(info_r.err())
+
+        info = info_r.ok()
+        contents = ps.stdout.read(info.size + 1)[:-1]
+        return Ok((info, contents))
+
+    def close(self) -> None:
+        for ps in [self._check_ps, self._batch_ps]:
+            if ps is None:
+                continue
+
+            assert ps.stdin is not None
+            ps.stdin.close()
+            ps.wait()
+            assert ps.stdout is not None
+            ps.stdout.close()
+
+        self._check_ps = self._batch_ps = None
+        self._check_pending = 0
+
+    def _drain_check_responses(self) -> None:
+        if self._check_ps is None:
+            return
+
+        assert self._check_ps.stdout is not None
+        while self._check_pending > 0:
+            self._check_ps.stdout.readline()
+            self._check_pending -= 1
+
+    def _request(self, mode: str, revs: List[str]) -> BResult[sp.Popen]:
+        for rev in revs:
+            if "\n" in rev:
+                return BErr(f"Invalid git revision: {rev!r}")
+
+        if mode == "--batch-check":
+            if self._check_ps is None:
+                self._check_ps = self._start(mode)
+            ps = self._check_ps
+
+            self._drain_check_responses()
+            self._check_pending = len(revs)
+            self._check_request_id += 1
+        else:
+            if self._batch_ps is None:
+                self._batch_ps = self._start(mode)
+            ps = self._batch_ps
+
+        try:
+            stdin: IO[bytes] = ps.stdin  # type: ignore
+            stdin.write("".join(rev + "\n" for rev in revs).encode())
+            stdin.flush()
+        except BrokenPipeError as e:
+            return BErr(
+                f"The `git cat-file {mode}` process has died.", cause=e
+            )
+
+        return Ok(ps)
+
+    def _start(self, mode: str) -> sp.Popen:
+        return sp.Popen(
+            ["git", "cat-file", mode],
+            cwd=self.cwd,
+            stdin=sp.PIPE,
+            stdout=sp.PIPE,
+            stderr=sp.DEVNULL,
+        )
+
+
+class _MissingObjectError(BugyiError):
+    pass
+
+
+def _parse_object_info(rev: str, raw_line: bytes) -> BResult[GitObjectInfo]:
+    line = raw_line.decode().rstrip("\n")
+    if not line:
+        return BErr(
+            "The `git cat-file` process exited unexpectedly while looking up"
+            f" {rev!r}."
+        )
+
+    # Parse from the right, since the <rev> in "<rev> missing" responses may
+    # contain spaces.
+    if line.rsplit(" ", 1)[-1] == "missing":
+        return Err(_MissingObjectError(f"Git object not found: {rev!r}"))
+
+    parts = line.rsplit(" ", 2)
+    if len(parts) != 3 or not parts[2].isdigit():
+        return BErr(f"Unable to look up the {rev!r} git object: {line!r}")
+
+    oid, type_, size = parts
+    return Ok(GitObjectInfo(oid, type_, int(size)))
+
+
+class GitRepo:
+    """A git repository whose (commonly queried) state is cached.
+
+    Every cached value is keyed on cheap `stat` calls against the files that
+    value is derived from (e.g. .git/HEAD for the current branch), so cached
+    values are never stale, but we also never run git (or re-read any
+    files) unless something has actually changed. This makes GitRepo
+    objects a good fit for long-running processes.
+    """
+
+    def __init__(self, paths: GitPaths) -> None:
+        self.paths = paths
+        self._cache: Dict[str, Tuple[Tuple[Any, ...], Any]] = {}
+
+        # Every config file that the last remotes() call read.
+        self._remote_config_files: List[str] = []
+
+    @classmethod
+    def discover(cls, cwd: str = None) -> BResult["GitRepo"]:
+        """Returns a GitRepo for the repository containing @cwd."""
+        paths = discover_repo(cwd)
+        if paths is None:
+            return BErr(
+                "Unable to find a (supported) git repository containing"
+                f" {os.getcwd() if cwd is None else cwd}."
+            )
+        return Ok(cls(paths))
+
+    def top_level_dir(self) -> str:
+        return self.paths.work_tree
+
+    def current_branch(self) -> BResult[str]:
+        return self._cached(
+            "current_branch",
+            [os.path.join(self.paths.git_dir, "HEAD")],
+            lambda: current_branch(cwd=self.paths.work_tree),
+        )
+
+    def remotes(self) -> BResult[List[GitRemote]]:
+        # Remotes can be defined by any config file that git reads (see
+        # _read_config_remotes()), including include.path files.
+        config_paths = _config_files(self.paths) + [
+            os.path.join(self.paths.common_dir, "remotes"),
+            os.path.join(self.paths.common_dir, "branches"),
+            os.path.join(self.paths.git_dir, "config.worktree"),
+            *self._remote_config_files,
+        ]
+        return self._cached(
+            "remotes",
+            config_paths,
+            self._read_remotes,
+            env_vars=_GIT_CONFIG_ENV_VARS,
+        )
+
+    def local_branches(self) -> BResult[FrozenSet[str]]:
+        heads_dir = os.path.join(self.paths.common_dir, "refs", "heads")
+        head_dirs = [heads_dir]
+        for root, dirs, _files in os.walk(heads_dir):
+            head_dirs.extend(os.path.join(root, d) for d in dirs)
+
+        return self._cached(
+            "local_branches",
+            [os.path.join(self.paths.common_dir, "packed-refs"), *head_dirs],
+            self._read_local_branches,
+        )
+
+    def local_branch_exists(self, branch: str) -> BResult[bool]:
+        branches_r = self.local_branches()
+        if isinstance(branches_r, Err):
+            return Err(branches_r.err())
+        return Ok(branch in branches_r.ok())
+
+    def _cached(
+        self,
+        name: str,
+        paths: List[str],
+        compute: Callable[[], BResult[T]],
+        *,
+        env_vars: Iterable[str] = (),
+    ) -> BResult[T]:
+        key = (
+            tuple(paths),
+            tuple(_stat_key(path) for path in paths),
+            tuple(os.environ.get(var) for var in env_vars),
+        )
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        result = compute()
+        if isinstance(result, Ok):
+            self._cache[name] = (key, result)
+        return result
+
+    def _read_remotes(self) -> BResult[List[GitRemote]]:
+        read_files: List[str] = []
+        remote_list = _read_config_remotes(self.paths, read_files)
+
+        # remotes() always checks the main config files.
+        main_files = _config_files(self.paths)
+        self._remote_config_files = [
+            path for path in read_files if path not in main_files
+        ]
+        if remote_list is not None:
+            return Ok(remote_list)
+        return _git_remotes(cwd=self.paths.work_tree)
+
+    def _read_local_branches(self) -> BResult[FrozenSet[str]]:
+        branches = set()
+
+        heads_dir = os.path.join(self.paths.common_dir, "refs", "heads")
+        for root, _dirs, files in os.walk(heads_dir):
+            for fname in files:
+                path = os.path.join(root, fname)
+                branches.add(os.path.relpath(path, heads_dir))
+
+        packed_refs = os.path.join(self.paths.common_dir, "packed-refs")
+        try:
+            with open(packed_refs) as f:
+                for line in f:
+                    _oid, _, ref = line.rstrip("\n").partition(" ")
+                    if ref.startswith("refs/heads/"):
+                        branches.add(ref[len("refs/heads/") :])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            return BErr(f"Unable to read {packed_refs}.", cause=e)
+
+        return Ok(frozenset(branches))
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
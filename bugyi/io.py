@@ -67,24 +67,40 @@ def ewrap(
     multiline_msg: str, width: int = 80, indent: int = 0
 ) -> Iterator[str]:
     """A better version of textwrap.wrap()."""
-    for msg in multiline_msg.split("\n"):
+    for msg in iter_lines(multiline_msg):
         if not msg:
             yield ""
             continue
 
         msg = (" " * indent) + msg
 
-        i = 0
-        while i < len(msg) and msg[i] == " ":
-            i += 1
+        # Fast path: textwrap.wrap() is slow, and it returns short (printable
+        # ASCII) lines unchanged (minus any trailing whitespace).
+        if (
+            len(msg) <= width
+            and msg.isascii()
+            and msg.isprintable()
+            and msg.strip(" ")
+        ):
+            yield msg.rstrip(" ")
+            continue
 
-        spaces = " " * i
+        spaces = " " * (len(msg) - len(msg.lstrip(" ")))
         for m in wrap(
             msg, width, subsequent_indent=spaces, drop_whitespace=True
         ):
             yield m
 
 
+def iter_lines(multiline_msg: str) -> Iterator[str]:
+    """Lazy version of str.split("\\n")."""
+    start = 0
+    while (end := multiline_msg.find("\n", start)) != -1:
+        yield multiline_msg[start:end]
+        start = end + 1
+    yield multiline_msg[start:]
+
+
 def efill(multiline_msg: str, width: int = 80, indent: int = 0) -> str:
     """A better version of textwrap.fill()."""
     return "\n".join(ewrap(multiline_msg, width, indent))
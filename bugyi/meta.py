@@ -3,12 +3,13 @@ Functions/classes which make use of Python's dynamic nature to inspect a
 program's internals.
 """
 
-from functools import wraps
+from functools import cached_property, lru_cache, wraps
 import inspect
+import linecache
 from os.path import abspath, isfile, realpath
 from pathlib import Path
 import sys
-from typing import Any, Callable, TypeVar, cast
+from typing import Any, Callable, Dict, FrozenSet, Tuple, TypeVar, cast
 from warnings import warn
 
 
@@ -23,19 +24,60 @@ def cname(obj: object) -> str:
 class Inspector:
     """
     Helper class for python introspection (e.g. What line number is this?)
+
+    Only the target frame's file name, function name, and line number are
+    captured at construction time (we do NOT call inspect.stack(), which
+    reads source lines for EVERY frame on the stack). Everything else is
+    resolved lazily the first time it is accessed.
     """
 
     def __init__(self, *, up: int = 0) -> None:
-        frame = inspect.stack()[up + 1]
-
-        self.module_name = _path_to_module(frame[1])
-        self.file_name = frame[1]
-        self.line_number = frame[2]
-        self.function_name = frame[3]
-        self.lines = "".join(frame[4] or [])
+        frame = sys._getframe(up + 1)
+
+        # We intentionally do not hold onto the frame itself, since doing so
+        # would keep all of its local variables alive.
+        code = frame.f_code
+        self.file_name = code.co_filename
+        self.function_name = code.co_name
+        self.line_number = frame.f_lineno
+
+    @classmethod
+    def from_dict(cls, inspector_dict: Dict[str, Any]) -> "Inspector":
+        """Inverse of the to_dict() method."""
+        inspector = cls.__new__(cls)
+        inspector.__dict__.update(inspector_dict)
+        return inspector
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            A dictionary (of builtin types only) that contains everything
+            this Inspector knows (including any lazily resolved values).
+        """
+        return {
+            "file_name": self.file_name,
+            "function_name": self.function_name,
+            "line_number": self.line_number,
+            "module_name": self.module_name,
+            "lines": self.lines,
+        }
+
+    @cached_property
+    def module_name(self) -> str:
+        return _path_to_module(self.file_name)
+
+    @cached_property
+    def lines(self) -> str:
+        return linecache.getline(self.file_name, self.line_number)
 
 
 def _path_to_module(path: str) -> str:
+    _PYPATH_INDEX.refresh()
+    return _cached_path_to_module(path)
+
+
+@lru_cache(maxsize=1024)
+def _cached_path_to_module(path: str) -> str:
     P = path
 
     # HACK: Improves the (still broken) output in some weird cases where
@@ -47,15 +89,45 @@ def _path_to_module(path: str) -> str:
     if P.endswith((".py", ".px")):
         P = P[:-3]
 
-    sorted_pypaths = sorted(sys.path, key=lambda x: -len(x))
-    for pypath in sorted_pypaths:
-        pypath = realpath(pypath)
-        P = P.replace(pypath + "/", "")
-
+    P = _PYPATH_INDEX.strip_prefix(P)
     P = P.replace("/", ".")
     return P
 
 
+class _PyPathIndex:
+    """
+    Index of the (resolved) directories contained in sys.path.
+
+    The index is only rebuilt when sys.path changes, at which point the
+    _cached_path_to_module() memo is invalidated as well.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: Tuple[str, ...] = ()
+        self._prefixes: FrozenSet[str] = frozenset()
+
+    def refresh(self) -> None:
+        snapshot = tuple(sys.path)
+        if snapshot == self._snapshot:
+            return
+
+        self._prefixes = frozenset(realpath(pypath) for pypath in snapshot)
+        self._snapshot = snapshot
+        _cached_path_to_module.cache_clear()
+
+    def strip_prefix(self, path: str) -> str:
+        """Strips the longest sys.path directory that @path lives under."""
+        i = path.rfind("/")
+        while i > 0:
+            if path[:i] in self._prefixes:
+                return path[i + 1 :]
+            i = path.rfind("/", 0, i)
+        return path
+
+
+_PYPATH_INDEX = _PyPathIndex()
+
+
 def scriptname(*, up: int = 0) -> str:
     frame = inspect.stack()[up + 1]
     return Path(frame.filename).stem
@@ -1,22 +1,40 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from functools import wraps
+from array import array
+import asyncio
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+from functools import update_wrapper, wraps
+import sys
+import threading
+import time
+from types import MethodType
 from typing import (
     Any,
+    Awaitable,
     Callable,
     Dict,
+    Generator,
     Generic,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
     NoReturn,
     Optional,
     Tuple,
+    Type,
     Union,
 )
 
 from .meta import cname
-from .types import E, T
+from .types import E, F, T, U
 
 
 class _ResultMixin(ABC, Generic[T, E]):
+    __slots__ = ()
+
     def __bool__(self) -> NoReturn:
         raise ValueError(
             f"{cname(self)} object cannot be evaluated as a boolean. This is"
@@ -41,11 +59,69 @@ class _ResultMixin(ABC, Generic[T, E]):
     def unwrap_or_else(self, op: Callable[[E], T]) -> T:
         pass
 
+    @abstractmethod
+    def map(self, op: Callable[[T], U]) -> "_ResultMixin[U, E]":
+        """Applies @op to an Ok value (Err results are left untouched)."""
+
+    @abstractmethod
+    def map_err(self, op: Callable[[E], F]) -> "_ResultMixin[T, F]":
+        """Applies @op to an Err error (Ok results are left untouched)."""
+
+    @abstractmethod
+    def and_then(
+        self, op: Callable[[T], "Result[U, E]"]
+    ) -> "_ResultMixin[U, E]":
+        """
+        Calls @op with an Ok value and returns the Result that @op returns
+        (Err results are left untouched).
+        """
+
+
+class _FrozenResult(_ResultMixin[T, E]):
+    """Base class for the (immutable) Ok and Err classes.
+
+    These classes used to be frozen dataclasses. They are now implemented
+    using __slots__ (so no instance carries a __dict__), but their equality,
+    hashing, repr, and immutability semantics are unchanged.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> NoReturn:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> NoReturn:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+class Ok(_FrozenResult[T, E]):
+    __slots__ = ("_value",)
+    __match_args__ = ("_value",)
 
-@dataclass(frozen=True)
-class Ok(_ResultMixin[T, E]):
     _value: T
 
+    def __new__(cls, _value: T) -> "Ok[T, E]":
+        if _value is None and cls is Ok:
+            return _OK_NONE
+
+        self = _object_new(cls)
+        _set_ok_value(self, _value)
+        return self
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (type(self), (self._value,))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__qualname__}(_value={self._value!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is self.__class__:
+            return (self._value,) == (other._value,)  # type: ignore
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self._value,))
+
     @staticmethod
     def err() -> None:
         return None
@@ -54,30 +130,84 @@ class Ok(_ResultMixin[T, E]):
         return self._value
 
     def unwrap(self) -> T:
-        return self.ok()
+        return self._value
 
     def unwrap_or(self, default: T) -> T:
-        return self.ok()
+        return self._value
 
     def unwrap_or_else(self, op: Callable[[E], T]) -> T:
-        return self.ok()
+        return self._value
+
+    def map(self, op: Callable[[T], U]) -> "Ok[U, E]":
+        return Ok(op(self._value))
+
+    def map_err(self, op: Callable[[E], F]) -> "Ok[T, F]":
+        return self  # type: ignore
 
+    def and_then(self, op: Callable[[T], "Result[U, E]"]) -> "Result[U, E]":
+        return op(self._value)
+
+
+class Err(_FrozenResult[T, E]):
+    __slots__ = ("_error",)
+    __match_args__ = ("_error",)
 
-@dataclass(frozen=True)
-class Err(_ResultMixin[T, E]):
     _error: E
 
+    def __init__(self, _error: E) -> None:
+        _set_err_error(self, _error)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (_new_err, (type(self), self._error))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__qualname__}(_error={self._error!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is self.__class__:
+            return (self._error,) == (other._error,)  # type: ignore
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self._error,))
+
     def err(self) -> E:
         return self._error
 
     def unwrap(self) -> NoReturn:
-        raise self.err()
+        raise self._error
 
     def unwrap_or(self, default: T) -> T:
         return default
 
     def unwrap_or_else(self, op: Callable[[E], T]) -> T:
-        return op(self.err())
+        return op(self._error)
+
+    def map(self, op: Callable[[T], U]) -> "Err[U, E]":
+        return self  # type: ignore
+
+    def map_err(self, op: Callable[[E], F]) -> "Err[T, F]":
+        return Err(op(self._error))
+
+    def and_then(self, op: Callable[[T], "Result[U, E]"]) -> "Err[U, E]":
+        return self  # type: ignore
+
+
+# Since Ok and Err override __setattr__, we use their slot descriptors
+# directly to initialize new instances.
+_object_new = object.__new__
+_set_ok_value = Ok._value.__set__  # type: ignore
+_set_err_error = Err._error.__set__  # type: ignore
+
+_OK_NONE: Ok[Any, Any] = _object_new(Ok)
+_set_ok_value(_OK_NONE, None)
+
+
+def _new_err(cls: Type[Err[T, E]], error: E) -> Err[T, E]:
+    """Used to unpickle Err objects (and objects of Err subclasses)."""
+    err = cls.__new__(cls)
+    _set_err_error(err, error)
+    return err
 
 
 # The 'Result' return type is used to implement an error-handling model heavily
@@ -86,6 +216,271 @@ class Err(_ResultMixin[T, E]):
 Result = Union[Ok[T, E], Err[T, E]]
 
 
+def collect(results: Iterable[Result[T, E]]) -> Result[List[T], E]:
+    """
+    Returns:
+        Ok(values) if every result in @results is an Ok result. Otherwise,
+        the first Err result found (in which case, the rest of @results is
+        NOT consumed).
+
+    Args:
+        results: Any iterable of Result objects (e.g. a generator). Lazy
+            results are forced one at a time.
+    """
+    values: List[T] = []
+    for result in results:
+        if isinstance(result, _LazyResult):
+            result = result.result()
+
+        if isinstance(result, Err):
+            return result  # type: ignore
+        values.append(result._value)
+    return Ok(values)
+
+
+def partition(results: Iterable[Result[T, E]]) -> Tuple[List[T], List[E]]:
+    """
+    Returns:
+        An (oks, errs) tuple, where @oks contains the values of all Ok results
+        in @results and @errs contains the errors of all Err results.
+
+    Args:
+        results: Any iterable of Result objects (e.g. a generator). Only a
+            single pass is made over @results.
+    """
+    oks: List[T] = []
+    errs: List[E] = []
+    for result in results:
+        if isinstance(result, _LazyResult):
+            result = result.result()
+
+        if isinstance(result, Err):
+            errs.append(result._error)
+        else:
+            oks.append(result._value)
+    return oks, errs
+
+
+class ResultBatch(Generic[T, E]):
+    """A compact, columnar alternative to List[Result[T, E]].
+
+    Ok values and Err errors are stored in two separate lists, so no Ok or
+    Err object is kept per item. A bitmap records which slots failed, and a
+    sorted array holds the indices of the failed slots. Ok / Err objects are
+    only created (on demand) when items are accessed as Results.
+
+    The class of each Err result (e.g. BErr) is preserved. This costs
+    nothing extra unless a single batch mixes different Err classes.
+
+    Examples:
+        >>> batch = ResultBatch.from_results([Ok(1), Err(KeyError()), Ok(3)])
+        >>> batch.ok_count, batch.err_count
+        (2, 1)
+        >>> list(batch.iter_oks())
+        [1, 3]
+        >>> [i for i, _ in batch.iter_errors()]
+        [1]
+    """
+
+    __slots__ = (
+        "_values",
+        "_errors",
+        "_err_slots",
+        "_failed",
+        "_size",
+        "_err_cls",
+        "_err_classes",
+    )
+
+    def __init__(self) -> None:
+        self._values: List[T] = []
+        self._errors: List[E] = []
+        self._err_slots = array("q")
+        # Bit i of this bitmap is set iff slot i holds an error.
+        self._failed = bytearray()
+        self._size = 0
+
+        # The class shared by every Err result or, once different Err classes
+        # have been appended, a list of every Err result's class.
+        self._err_cls: Type[Err[T, E]] = Err
+        self._err_classes: Optional[List[Type[Err[T, E]]]] = None
+
+    @classmethod
+    def from_results(
+        cls, results: Iterable[Result[T, E]]
+    ) -> "ResultBatch[T, E]":
+        """Builds a ResultBatch from any iterable of results (in one pass)."""
+        batch: ResultBatch[T, E] = cls()
+        batch.extend(results)
+        return batch
+
+    def to_list(self) -> List[Result[T, E]]:
+        return list(self)
+
+    @property
+    def ok_count(self) -> int:
+        return len(self._values)
+
+    @property
+    def err_count(self) -> int:
+        return len(self._errors)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return "{}(ok_count={}, err_count={})".format(
+            cname(self), self.ok_count, self.err_count
+        )
+
+    def append(self, result: Result[T, E]) -> None:
+        if isinstance(result, _LazyResult):
+            result = result.result()
+
+        if isinstance(result, Err):
+            self.append_err(result._error, err_cls=type(result))
+        else:
+            self.append_ok(result._value)
+
+    def append_ok(self, value: T) -> None:
+        if not self._size & 7:
+            self._failed.append(0)
+        self._values.append(value)
+        self._size += 1
+
+    def append_err(self, error: E, *, err_cls: Type[Err] = Err) -> None:
+        if self._err_classes is not None:
+            self._err_classes.append(err_cls)
+        elif err_cls is not self._err_cls:
+            if self._errors:
+                self._err_classes = [self._err_cls] * len(self._errors)
+                self._err_classes.append(err_cls)
+            else:
+                self._err_cls = err_cls
+
+        i = self._size
+        if not i & 7:
+            self._failed.append(0)
+        self._failed[i >> 3] |= 1 << (i & 7)
+        self._errors.append(error)
+        self._err_slots.append(i)
+        self._size += 1
+
+    def extend(self, results: Iterable[Result[T, E]]) -> None:
+        for result in results:
+            self.append(result)
+
+    def is_err(self, i: int) -> bool:
+        """Returns True if the @i-th result is an Err result (in O(1))."""
+        i = self._check_index(i)
+        return bool(self._failed[i >> 3] & (1 << (i & 7)))
+
+    def __getitem__(self, i: int) -> Result[T, E]:
+        i = self._check_index(i)
+        # The number of failed slots before slot @i.
+        rank = bisect_left(self._err_slots, i)
+        if self._failed[i >> 3] & (1 << (i & 7)):
+            return self._make_err(rank)
+        return Ok(self._values[i - rank])
+
+    def __iter__(self) -> Iterator[Result[T, E]]:
+        values = iter(self._values)
+        start = 0
+        for rank, i in enumerate(self._err_slots):
+            for _ in range(i - start):
+                yield Ok(next(values))
+            yield self._make_err(rank)
+            start = i + 1
+
+        for value in values:
+            yield Ok(value)
+
+    def iter_oks(self) -> Iterator[T]:
+        """Iterates over the values of every Ok result."""
+        return iter(self._values)
+
+    def iter_errors(self) -> Iterator[Tuple[int, E]]:
+        """Iterates over (index, error) tuples for every Err result."""
+        return zip(self._err_slots, self._errors)
+
+    def _make_err(self, rank: int) -> Err[T, E]:
+        if self._err_classes is None:
+            err_cls = self._err_cls
+        else:
+            err_cls = self._err_classes[rank]
+
+        if err_cls is Err:
+            return Err(self._errors[rank])
+        # Err subclasses (e.g. BErr) may not share Err's constructor.
+        return _new_err(err_cls, self._errors[rank])
+
+    def _check_index(self, i: int) -> int:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"{cname(self)} index out of range")
+        return i
+
+
+class CacheStats(NamedTuple):
+    """Statistics for a function decorated by cached_result().
+
+    Attributes:
+        hits: Calls answered without calling the decorated function (this
+            includes calls that waited on an identical call that was already
+            in flight).
+        misses: Calls that called the decorated function.
+        maxsize: The cache's maximum size (None if the cache is unbounded).
+        currsize: The number of results currently cached.
+    """
+
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+def cached_result(
+    *,
+    maxsize: Optional[int] = 128,
+    ttl: Optional[float] = None,
+    cache_errors: bool = False,
+    clock: Callable[[], float] = time.monotonic,
+) -> Callable[[Callable[..., Result[T, E]]], "_CachedResultFunction[T, E]"]:
+    """Memoizes a function that returns a Result.
+
+    Unlike functools.lru_cache(), concurrent calls with the same arguments
+    are "single-flight": only one thread calls the decorated function while
+    the others wait for (and then share) its result.
+
+    The decorated function gains cache_stats() and cache_clear() methods.
+
+    Args:
+        maxsize: The maximum number of results to cache. When full, the least
+            recently used result is evicted. Set to None for an unbounded
+            cache.
+        ttl: Number of seconds that a cached result remains valid for. Set
+            to None to keep results until they are evicted.
+        cache_errors: If False, Err results are never cached, so the next
+            call with the same arguments tries again (calls that were
+            already waiting on the failed call still share its Err result).
+        clock: Returns the current time (in seconds).
+    """
+
+    def decorator(
+        func: Callable[..., Result[T, E]]
+    ) -> _CachedResultFunction[T, E]:
+        return _CachedResultFunction(
+            func,
+            maxsize=maxsize,
+            ttl=ttl,
+            cache_errors=cache_errors,
+            clock=clock,
+        )
+
+    return decorator
+
+
 def return_lazy_result(
     func: Callable[..., Result[T, E]]
 ) -> Callable[..., "_LazyResult[T, E]"]:
@@ -96,6 +491,61 @@ def return_lazy_result(
     return wrapper
 
 
+def return_async_lazy_result(
+    func: Callable[..., Awaitable[Result[T, E]]]
+) -> Callable[..., "_AsyncLazyResult[T, E]"]:
+    """Async counterpart of the return_lazy_result() decorator.
+
+    The decorated coroutine function is not called until its result is first
+    awaited.
+    """
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> _AsyncLazyResult[T, E]:
+        return _AsyncLazyResult(func, *args, **kwargs)
+
+    return wrapper
+
+
+def force_all(
+    lazy_results: Iterable["_LazyResult[T, E]"],
+    *,
+    executor: Executor = None,
+) -> List[Result[T, E]]:
+    """Forces many lazy results in parallel.
+
+    Returns:
+        The results of @lazy_results (in the same order). Each lazy result's
+        value is memoized, just as if its result() method had been called.
+
+    Args:
+        lazy_results: The lazy results to force.
+        executor (opt): The thread or process pool to force @lazy_results
+            in. Defaults to a new ThreadPoolExecutor. When a
+            ProcessPoolExecutor is used, the functions behind
+            @lazy_results must be defined at the top level of a module.
+    """
+    lazy_list = list(lazy_results)
+    if executor is None:
+        with ThreadPoolExecutor() as pool:
+            return force_all(lazy_list, executor=pool)
+
+    futures: Dict[int, "Future[Result[T, E]]"] = {}
+    for lazy in lazy_list:
+        if lazy._result is None and id(lazy) not in futures:
+            futures[id(lazy)] = executor.submit(_force_lazy_result, lazy)
+
+    for lazy in lazy_list:
+        future = futures.get(id(lazy))
+        if future is not None:
+            result = future.result()
+            with lazy._lock:
+                if lazy._result is None:
+                    lazy._result = result
+
+    return [lazy.result() for lazy in lazy_list]
+
+
 class _LazyResult(_ResultMixin[T, E]):
     def __init__(
         self, func: Callable[..., Result[T, E]], *args: Any, **kwargs: Any
@@ -105,11 +555,37 @@ class _LazyResult(_ResultMixin[T, E]):
         self._kwargs: Dict[str, Any] = kwargs
 
         self._result: Optional[Result[T, E]] = None
+        self._lock = threading.Lock()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Functions decorated by return_lazy_result() cannot be pickled by
+        # reference, since the module-level name that they would be looked up
+        # by refers to the decorated function. So we pickle the decorated
+        # function instead and unwrap it when unpickling.
+        func: Any = self._func
+        module = sys.modules.get(func.__module__)
+        decorated = module
+        for attr in func.__qualname__.split("."):
+            decorated = getattr(decorated, attr, None)
+
+        unwrap = getattr(decorated, "__wrapped__", None) is func
+        if unwrap:
+            func = decorated
+
+        return (
+            _new_lazy_result,
+            (func, unwrap, self._args, self._kwargs, self._result),
+        )
 
     def result(self) -> Result[T, E]:
-        if self._result is None:
-            self._result = self._func(*self._args, **self._kwargs)
-        return self._result
+        result = self._result
+        if result is None:
+            # Ensures that concurrent callers never compute the result twice.
+            with self._lock:
+                if self._result is None:
+                    self._result = self._func(*self._args, **self._kwargs)
+                result = self._result
+        return result
 
     def err(self) -> Optional[E]:
         return self.result().err()
@@ -122,3 +598,192 @@ class _LazyResult(_ResultMixin[T, E]):
 
     def unwrap_or_else(self, op: Callable[[E], T]) -> T:
         return self.result().unwrap_or_else(op)
+
+    # The methods below are lazy too: @op is not called until the returned
+    # _LazyResult is forced.
+    def map(self, op: Callable[[T], U]) -> "_LazyResult[U, E]":
+        return _LazyResult(lambda: self.result().map(op))
+
+    def map_err(self, op: Callable[[E], F]) -> "_LazyResult[T, F]":
+        return _LazyResult(lambda: self.result().map_err(op))
+
+    def and_then(self, op: Callable[[T], Result[U, E]]) -> "_LazyResult[U, E]":
+        return _LazyResult(lambda: self.result().and_then(op))
+
+
+def _new_lazy_result(
+    func: Callable[..., Any],
+    unwrap: bool,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    result: Optional[Result[T, E]],
+) -> _LazyResult[T, E]:
+    """Used to unpickle _LazyResult objects."""
+    if unwrap:
+        func = func.__wrapped__  # type: ignore
+    lazy: _LazyResult[T, E] = _LazyResult(func, *args, **kwargs)
+    lazy._result = result
+    return lazy
+
+
+def _force_lazy_result(lazy: _LazyResult[T, E]) -> Result[T, E]:
+    return lazy.result()
+
+
+class _AsyncLazyResult(Generic[T, E]):
+    """An awaitable lazy result (see return_async_lazy_result()).
+
+    The first await starts the underlying coroutine as a task. Every other
+    awaiter (including concurrent ones) shares that same task, so the
+    coroutine only ever runs once.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Result[T, E]]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        self._func = func
+        self._args: Tuple[Any, ...] = args
+        self._kwargs: Dict[str, Any] = kwargs
+
+        self._task: Optional["asyncio.Future[Result[T, E]]"] = None
+
+    def __await__(self) -> Generator[Any, None, Result[T, E]]:
+        return self.task().__await__()
+
+    def task(self) -> "asyncio.Future[Result[T, E]]":
+        """
+        Returns:
+            The (possibly already finished) task computing this result. The
+            task is created (on the running event loop) the first time this
+            method is called.
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(
+                self._func(*self._args, **self._kwargs)
+            )
+        return self._task
+
+    def done(self) -> bool:
+        return self._task is not None and self._task.done()
+
+
+class _InFlightCall:
+    __slots__ = ("done", "result", "exception")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+
+
+# Separates positional arguments from keyword arguments in cache keys.
+_KWARGS_MARK = object()
+
+
+class _CachedResultFunction(Generic[T, E]):
+    """A function decorated by cached_result()."""
+
+    def __init__(
+        self,
+        func: Callable[..., Result[T, E]],
+        *,
+        maxsize: Optional[int],
+        ttl: Optional[float],
+        cache_errors: bool,
+        clock: Callable[[], float],
+    ) -> None:
+        update_wrapper(self, func)
+        self._func = func
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._cache_errors = cache_errors
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        # Maps cache keys to (expiration time, result) tuples.
+        self._entries: "OrderedDict[Any, Tuple[float, Result[T, E]]]" = (
+            OrderedDict()
+        )
+        self._in_flight: Dict[Any, _InFlightCall] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Result[T, E]:
+        key: Any = args
+        if kwargs:
+            key += (_KWARGS_MARK,) + tuple(kwargs.items())
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expiration, result = entry
+                if self._clock() < expiration:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return result
+                del self._entries[key]
+
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if call is None:
+                call = self._in_flight[key] = _InFlightCall()
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            result = self._func(*args, **kwargs)
+        except BaseException as e:
+            call.exception = e
+            raise
+        else:
+            call.result = result
+            if self._cache_errors or not isinstance(result, Err):
+                self._put(key, result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def __get__(self, instance: Any, owner: Any = None) -> Any:
+        # Allows methods to be decorated (the instance becomes part of each
+        # cache key, just as with functools.lru_cache()).
+        if instance is None:
+            return self
+        return MethodType(self, instance)
+
+    def cache_stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, self._maxsize, len(self._entries)
+            )
+
+    def cache_clear(self) -> None:
+        """Removes every cached result and resets this cache's stats."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def _put(self, key: Any, result: Result[T, E]) -> None:
+        if self._ttl is None:
+            expiration = float("inf")
+        else:
+            expiration = self._clock() + self._ttl
+
+        with self._lock:
+            self._entries[key] = (expiration, result)
+            self._entries.move_to_end(key)
+            if self._maxsize is not None:
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
@@ -1,28 +1,81 @@
+import asyncio
+import atexit
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import cached_property
+import hashlib
+from io import BufferedReader
+import json
+import math
 import os
+from pathlib import Path
+import queue
+import re
+import resource
+import selectors
+import shlex
 import subprocess as sp
-from typing import Any, Iterable, List, Tuple
+import sys
+import tempfile
+import threading
+import time
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+import uuid
+
+from loguru import logger as log
 
 from . import xdg
 from .errors import BErr, BResult, BugyiError
 from .result import Err, Ok
+from .types import PathLike, T
 
 
 def safe_popen(
-    cmd_parts: Iterable[str], *, up: int = 0, **kwargs: Any
+    cmd_parts: Iterable[str],
+    *,
+    up: int = 0,
+    cache: "PopenCache" = None,
+    **kwargs: Any,
 ) -> BResult[Tuple[str, str]]:
     """Wrapper for subprocess.Popen(...).
 
+    Args:
+        cache (opt): If provided, the command's (successful) result is
+            looked up in / stored in this cache. Only use this for read-only
+            commands whose output is captured!
+
     Returns:
         Ok((out, err)) if the command is successful.
             OR
         Err(BugyiError) otherwise.
     """
     cmd_list = list(cmd_parts)
+    if cache is not None:
+        return cache.safe_popen(cmd_list, up=up + 1, **kwargs)
 
     kwargs.setdefault("stdout", sp.PIPE)
     kwargs.setdefault("stderr", sp.PIPE)
 
-    ps = sp.Popen(cmd_list, **kwargs)
+    ps = _popen(cmd_list, **kwargs)
 
     proc = DoneProcess(ps, cmd_list)
     if ps.returncode != 0:
@@ -31,6 +84,35 @@ def safe_popen(
     return Ok((proc.out, proc.err))
 
 
+def safe_popen_raw(
+    cmd_parts: Iterable[str], *, up: int = 0, **kwargs: Any
+) -> BResult["DoneProcess"]:
+    """Variant of safe_popen() that does NOT eagerly decode the output.
+
+    Use this function instead of safe_popen() when you only need the
+    command's raw (bytes) output or only care about one of its output
+    streams.
+
+    Returns:
+        Ok(DoneProcess) if the command is successful (the DoneProcess object
+        is created in lazy mode).
+            OR
+        Err(BugyiError) otherwise.
+    """
+    cmd_list = list(cmd_parts)
+
+    kwargs.setdefault("stdout", sp.PIPE)
+    kwargs.setdefault("stderr", sp.PIPE)
+
+    ps = _popen(cmd_list, **kwargs)
+
+    proc = DoneProcess(ps, cmd_list, lazy=True)
+    if proc.returncode != 0:
+        return proc.to_error(up=up + 1)
+
+    return Ok(proc)
+
+
 def unsafe_popen(cmd_parts: Iterable[str], **kwargs: Any) -> Tuple[str, str]:
     """Wrapper for subprocess.Popen(...)
 
@@ -47,38 +129,1142 @@ def unsafe_popen(cmd_parts: Iterable[str], **kwargs: Any) -> Tuple[str, str]:
     if "stderr" not in kwargs:
         kwargs["stderr"] = sp.PIPE
 
-    ps = sp.Popen(cmd_list, **kwargs)
+    ps = _popen(cmd_list, **kwargs)
     proc = DoneProcess(ps, cmd_list)
 
     return (proc.out, proc.err)
 
 
+async def async_safe_popen(
+    cmd_parts: Iterable[str], *, up: int = 0, **kwargs: Any
+) -> BResult[Tuple[str, str]]:
+    """Asynchronous (asyncio) counterpart of safe_popen().
+
+    Returns:
+        Ok((out, err)) if the command is successful.
+            OR
+        Err(BugyiError) otherwise.
+    """
+    cmd_list = list(cmd_parts)
+
+    kwargs.setdefault("stdout", asyncio.subprocess.PIPE)
+    kwargs.setdefault("stderr", asyncio.subprocess.PIPE)
+
+    ps = await asyncio.create_subprocess_exec(*cmd_list, **kwargs)
+
+    proc = await DoneProcess.from_async_process(ps, cmd_list)
+    if proc.returncode != 0:
+        return proc.to_error(up=up + 1)
+
+    return Ok((proc.out, proc.err))
+
+
+async def async_unsafe_popen(
+    cmd_parts: Iterable[str], **kwargs: Any
+) -> Tuple[str, str]:
+    """Asynchronous (asyncio) counterpart of unsafe_popen().
+
+    Returns: (out, err)
+    """
+    cmd_list = list(cmd_parts)
+
+    kwargs.setdefault("stdout", asyncio.subprocess.PIPE)
+    kwargs.setdefault("stderr", asyncio.subprocess.PIPE)
+
+    ps = await asyncio.create_subprocess_exec(*cmd_list, **kwargs)
+    proc = await DoneProcess.from_async_process(ps, cmd_list)
+
+    return (proc.out, proc.err)
+
+
+async def gather(*aws: Awaitable[T], max_concurrency: int = 64) -> List[T]:
+    """Bounded-concurrency version of asyncio.gather().
+
+    At most @max_concurrency of the given awaitables are run at the same
+    time, which keeps us from exhausting file descriptors when we have
+    hundreds of async_safe_popen() calls to make.
+
+    Returns:
+        The results of @aws (in the same order as @aws).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return list(await asyncio.gather(*[run(aw) for aw in aws]))
+
+
+class Command(NamedTuple):
+    """A single command to be run by run_many()."""
+
+    cmd_parts: Sequence[str]
+    cwd: Optional[str] = None
+    env: Optional[Mapping[str, str]] = None
+
+
+@dataclass
+class BatchStats:
+    """Timing statistics collected by a BatchRun.
+
+    Attributes:
+        wall_time: Wall-clock time taken by the batch as a whole.
+        command_time: Sum of every command's individual wall-clock time (i.e.
+            how long the batch would have taken if run serially).
+        cpu_time: User + system CPU time consumed by child processes.
+    """
+
+    wall_time: float = 0.0
+    command_time: float = 0.0
+    cpu_time: float = 0.0
+
+    @property
+    def speedup(self) -> float:
+        if self.wall_time == 0:
+            return 1.0
+        return self.command_time / self.wall_time
+
+
+def run_many(
+    commands: Iterable[Union[Command, Sequence[str]]],
+    *,
+    max_workers: int = None,
+    ordered: bool = True,
+    **kwargs: Any,
+) -> "BatchRun":
+    """Runs many commands in parallel using a thread pool.
+
+    Args:
+        commands: The commands to run. Each command is either a Command object
+            (which allows for per-command cwd / env) or a sequence of command
+            arguments.
+        max_workers (opt): Maximum number of commands to run at once. Defaults
+            to ThreadPoolExecutor's default.
+        ordered: If True, results are yielded in the same order as
+            @commands. Otherwise, results are yielded as they complete.
+        **kwargs: Passed to every safe_popen() call.
+
+    Returns:
+        An iterable BatchRun object that yields a BResult for every command.
+        Its `stats` attribute is populated once iteration completes.
+    """
+    return BatchRun(
+        commands, max_workers=max_workers, ordered=ordered, **kwargs
+    )
+
+
+class BatchRun:
+    def __init__(
+        self,
+        commands: Iterable[Union[Command, Sequence[str]]],
+        *,
+        max_workers: int = None,
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> None:
+        self.commands = [
+            cmd if isinstance(cmd, Command) else Command(cmd)
+            for cmd in commands
+        ]
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.kwargs = kwargs
+
+        self.stats = BatchStats()
+
+    def __iter__(self) -> Iterator[BResult[Tuple[str, str]]]:
+        start_time = time.perf_counter()
+        start_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._run, cmd) for cmd in self.commands
+            ]
+            try:
+                done = futures if self.ordered else as_completed(futures)
+                for future in done:
+                    result, command_time = future.result()
+                    self.stats.command_time += command_time
+                    yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        end_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.stats.wall_time = time.perf_counter() - start_time
+        self.stats.cpu_time = (end_usage.ru_utime - start_usage.ru_utime) + (
+            end_usage.ru_stime - start_usage.ru_stime
+        )
+
+    def _run(self, cmd: Command) -> Tuple[BResult[Tuple[str, str]], float]:
+        kwargs = dict(self.kwargs)
+        if cmd.cwd is not None:
+            kwargs["cwd"] = cmd.cwd
+        if cmd.env is not None:
+            kwargs["env"] = cmd.env
+
+        start_time = time.perf_counter()
+        result = safe_popen(cmd.cmd_parts, **kwargs)
+        return result, time.perf_counter() - start_time
+
+
 class DoneProcess:
-    def __init__(self, ps: sp.Popen, cmd_list: List[str]) -> None:
+    """A finished process along with its (captured) output.
+
+    Args:
+        ps: The process. DoneProcess() waits for it to finish.
+        cmd_list: The command that @ps is running.
+        lazy: If True, the process output is not decoded until the `out` /
+            `err` attributes are first accessed (so any decode errors are
+            deferred until then too). The raw output is always available
+            (without copying) via the `raw_out` / `raw_err` attributes and
+            the `out_view()` / `err_view()` methods.
+    """
+
+    def __init__(
+        self, ps: sp.Popen, cmd_list: List[str], *, lazy: bool = False
+    ) -> None:
+        stdout, stderr = ps.communicate()
+        self._set_output(ps, cmd_list, stdout, stderr, lazy=lazy)
+
+        if isinstance(ps, _InstrumentedPopen):
+            ps.run_hooks(self)
+
+    @classmethod
+    async def from_async_process(
+        cls,
+        ps: asyncio.subprocess.Process,
+        cmd_list: List[str],
+        *,
+        lazy: bool = False,
+    ) -> "DoneProcess":
+        stdout, stderr = await ps.communicate()
+
+        proc = cls.__new__(cls)
+        proc._set_output(ps, cmd_list, stdout, stderr, lazy=lazy)
+        return proc
+
+    def _set_output(
+        self,
+        ps: Any,
+        cmd_list: List[str],
+        stdout: Optional[bytes],
+        stderr: Optional[bytes],
+        *,
+        lazy: bool = False,
+    ) -> None:
         self.ps = ps
         self.cmd_list = cmd_list
+        self.returncode: int = ps.returncode
 
-        stdout, stderr = ps.communicate()
-        self.out = "" if stdout is None else str(stdout.decode().strip())
-        self.err = "" if stderr is None else str(stderr.decode().strip())
-
-    def to_error(self, *, up: int = 0) -> Err[Tuple[str, str], BugyiError]:
-        maybe_out = ""
-        if self.out:
-            maybe_out = "\n\n----- STDOUT\n{}".format(self.out)
-
-        maybe_err = ""
-        if self.err:
-            maybe_err = "\n\n----- STDERR\n{}".format(self.err)
-
-        return BErr(
-            "Command Failed (ec={}): {!r}{}{}".format(
-                self.ps.returncode, self.cmd_list, maybe_out, maybe_err
-            ),
+        self.raw_out = b"" if stdout is None else stdout
+        self.raw_err = b"" if stderr is None else stderr
+
+        if not lazy:
+            # Force the cached `out` / `err` properties to be evaluated now.
+            _ = self.out, self.err
+
+    @cached_property
+    def out(self) -> str:
+        return self.raw_out.decode().strip()
+
+    @cached_property
+    def err(self) -> str:
+        return self.raw_err.decode().strip()
+
+    def out_view(self) -> memoryview:
+        return memoryview(self.raw_out)
+
+    def err_view(self) -> memoryview:
+        return memoryview(self.raw_err)
+
+    def to_error(self, *, up: int = 0) -> Err[Any, BugyiError]:
+        # We don't use the `out` / `err` attributes here since we do NOT want
+        # decode errors to keep us from reporting a failed command.
+        return _command_error(
+            self.returncode,
+            self.cmd_list,
+            self.raw_out.decode(errors="replace").strip(),
+            self.raw_err.decode(errors="replace").strip(),
             up=up + 1,
         )
 
 
+def stream_popen(
+    cmd_parts: Iterable[str],
+    *,
+    tail_lines: int = 100,
+    spill_threshold: int = 1024 * 1024,
+    keep_err_file: bool = False,
+    errors: str = "replace",
+    **kwargs: Any,
+) -> "StreamingProcess":
+    """Streaming variant of safe_popen().
+
+    Use this function instead of safe_popen() when a command's output is
+    too big to comfortably hold in memory.
+
+    Examples:
+        with stream_popen(["git", "log"]) as proc:
+            for line in proc:
+                ...
+
+        if isinstance(result := proc.result(), Err):
+            ...
+
+    Args:
+        tail_lines: The number of trailing STDOUT / STDERR lines that are
+            kept around for the error report.
+        spill_threshold: Once the command's STDERR output grows beyond this
+            many bytes, it is written to a temporary file instead of being
+            kept in memory.
+        keep_err_file: By default, the STDERR temporary file is removed when
+            the command succeeds or the StreamingProcess is closed. If True,
+            it is kept when the command fails, and the caller is responsible
+            for removing the file (see StreamingProcess.err_path). Error
+            reports only point to this file when it is kept.
+        errors: The error handler used to decode STDOUT (e.g. use
+            "surrogateescape" when the output contains file paths, so they
+            round-trip through os.fsencode()).
+        **kwargs: Passed to subprocess.Popen(...).
+
+    Returns:
+        A StreamingProcess object, which yields the command's STDOUT (one
+        decoded line at a time, without the trailing newline) when iterated
+        over.
+    """
+    return StreamingProcess(
+        list(cmd_parts),
+        tail_lines=tail_lines,
+        spill_threshold=spill_threshold,
+        keep_err_file=keep_err_file,
+        errors=errors,
+        **kwargs,
+    )
+
+
+class StreamingProcess:
+    def __init__(
+        self,
+        cmd_list: List[str],
+        *,
+        tail_lines: int = 100,
+        spill_threshold: int = 1024 * 1024,
+        keep_err_file: bool = False,
+        errors: str = "replace",
+        **kwargs: Any,
+    ) -> None:
+        self.cmd_list = cmd_list
+        self.spill_threshold = spill_threshold
+        self.keep_err_file = keep_err_file
+        self.errors = errors
+        self.returncode: Optional[int] = None
+
+        # The full STDERR output lives in this file once it grows too large.
+        self.err_path: Optional[str] = None
+
+        self._out_tail: Deque[str] = deque(maxlen=tail_lines)
+        self._err_tail: Deque[str] = deque(maxlen=tail_lines)
+        self._out_count = 0
+        self._err_count = 0
+
+        kwargs["stdout"] = sp.PIPE
+        kwargs["stderr"] = sp.PIPE
+        self.ps = sp.Popen(cmd_list, **kwargs)
+
+        # STDERR needs to be drained concurrently to avoid deadlocking when
+        # the command fills up the STDERR pipe's buffer.
+        self._err_thread = threading.Thread(target=self._drain_err)
+        self._err_thread.daemon = True
+        self._err_thread.start()
+
+    def __enter__(self) -> "StreamingProcess":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        return self.records(b"\n")
+
+    def records(self, sep: bytes = b"\0") -> Iterator[str]:
+        """
+        Yields the command's STDOUT (decoded) one @sep-delimited record at a
+        time (e.g. use sep=b"\\0" for `find -print0` or `git log -z`).
+        """
+        if self.returncode is not None:
+            return
+
+        assert self.ps.stdout is not None
+        stdout = cast(BufferedReader, self.ps.stdout)
+
+        buf = b""
+        while chunk := stdout.read1(65536):
+            buf += chunk
+            *raw_records, buf = buf.split(sep)
+            for raw_record in raw_records:
+                yield self._add_out_record(raw_record)
+
+        if buf:
+            yield self._add_out_record(buf)
+
+        self._wait()
+
+    def _add_out_record(self, raw_record: bytes) -> str:
+        record = raw_record.decode(errors=self.errors)
+        self._out_tail.append(record)
+        self._out_count += 1
+        return record
+
+    @property
+    def out(self) -> str:
+        return _tail_string(self._out_tail, self._out_count, None).strip()
+
+    @property
+    def err(self) -> str:
+        # Only point to the full STDERR output if it will outlive us.
+        full_path = self.err_path if self.keep_err_file else None
+        return _tail_string(self._err_tail, self._err_count, full_path).strip()
+
+    def result(self, *, up: int = 0) -> BResult[None]:
+        """
+        Returns:
+            Ok(None) if the command is successful.
+                OR
+            Err(BugyiError) otherwise.
+
+        Side Effects:
+            Consumes (and discards) any STDOUT output that has not been
+            iterated over yet.
+        """
+        for _ in self:
+            pass
+
+        if self.returncode != 0:
+            return self.to_error(up=up + 1)
+
+        return Ok(None)
+
+    def to_error(self, *, up: int = 0) -> Err[None, BugyiError]:
+        return _command_error(
+            self.returncode, self.cmd_list, self.out, self.err, up=up + 1
+        )
+
+    def close(self) -> None:
+        """Kills the command (if it is still running) and cleans up."""
+        if self.ps.poll() is None:
+            self.ps.kill()
+        self._wait()
+
+        if not self.keep_err_file:
+            self._remove_err_file()
+
+    def _wait(self) -> None:
+        self.returncode = self.ps.wait()
+        self._err_thread.join()
+
+        assert self.ps.stdout is not None
+        self.ps.stdout.close()
+
+        if self.returncode == 0:
+            self._remove_err_file()
+
+    def _remove_err_file(self) -> None:
+        if self.err_path is not None:
+            os.remove(self.err_path)
+            self.err_path = None
+
+    def _drain_err(self) -> None:
+        assert self.ps.stderr is not None
+
+        # STDERR is buffered in memory until it grows beyond the spill
+        # threshold, at which point it is moved to a temporary file.
+        err_buffer = bytearray()
+        spill_file: Optional[IO[bytes]] = None
+        try:
+            for raw_line in self.ps.stderr:
+                self._err_tail.append(
+                    raw_line.decode(errors="replace").rstrip("\n")
+                )
+                self._err_count += 1
+
+                if spill_file is not None:
+                    spill_file.write(raw_line)
+                    continue
+
+                err_buffer += raw_line
+                if len(err_buffer) > self.spill_threshold:
+                    spill_file = tempfile.NamedTemporaryFile(
+                        prefix="bugyi-stderr-", delete=False
+                    )
+                    self.err_path = spill_file.name
+                    spill_file.write(err_buffer)
+                    err_buffer = bytearray()
+        except Exception:
+            log.exception("Failed to capture STDERR of {!r}", self.cmd_list)
+            # The pipe MUST still be drained. Otherwise, the command blocks
+            # forever once it fills up the STDERR pipe's buffer.
+            while self.ps.stderr.read(65536):
+                pass
+        finally:
+            self.ps.stderr.close()
+            if spill_file is not None:
+                spill_file.close()
+
+
+class ShellWorker:
+    """A long-lived bash coprocess that runs commands on our behalf.
+
+    A ShellWorker ONLY pays off for shell builtins (e.g. `true`, `echo`,
+    `test`), which it runs without spawning a new process at all. External
+    binaries (e.g. `/bin/true`, `git`) still require bash to fork and exec
+    a new process, and the extra round-trip through the shell makes them
+    SLOWER than they would be with safe_popen() (see
+    benchmarks/bench_subprocess.py).
+
+    Commands see the current value of os.environ (changes made since the
+    worker was started are exported to the shell before each command),
+    unless an explicit environment is given.
+
+    Each command's output is delimited by sentinel lines that are written
+    to STDOUT (along with the command's exit status) and STDERR once the
+    command completes. Commands read STDIN from /dev/null.
+
+    WARNING: Commands are run by the same shell, so shell state (e.g.
+    variables set by a command) persists between commands. Commands that
+    make the shell exit (e.g. `exit 1`) are reported as failed and cause
+    the worker to be restarted.
+    """
+
+    _ENV_NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sentinel = "__BUGYI_SHELL_WORKER_{}__".format(uuid.uuid4().hex)
+        self._start()
+
+    def __enter__(self) -> "ShellWorker":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        self.close()
+
+    def safe_popen(
+        self,
+        cmd_parts: Iterable[str],
+        *,
+        up: int = 0,
+        cwd: str = None,
+        env: Mapping[str, str] = None,
+    ) -> BResult[Tuple[str, str]]:
+        """Runs a command using this shell worker.
+
+        Unlike safe_popen(), only the @cwd and @env keyword arguments are
+        supported (and, as with safe_popen(), @env REPLACES the command's
+        environment).
+
+        Returns:
+            Ok((out, err)) if the command is successful.
+                OR
+            Err(BugyiError) otherwise.
+        """
+        cmd_list = list(cmd_parts)
+
+        cmd = shlex.join(cmd_list)
+        if env is not None:
+            cmd = "env -i -- {} {}".format(
+                " ".join(shlex.quote(f"{k}={v}") for k, v in env.items()),
+                cmd,
+            )
+
+        if cwd is None:
+            script = "{{ {}\n}} </dev/null".format(cmd)
+        else:
+            script = "( cd {} && {}\n) </dev/null".format(
+                shlex.quote(cwd), cmd
+            )
+
+        with self._lock:
+            if env is None:
+                script = self._sync_env() + script
+            returncode, stdout, stderr = self._run(script)
+
+        out = stdout.decode().strip()
+        err = stderr.decode().strip()
+        if returncode != 0:
+            return _command_error(returncode, cmd_list, out, err, up=up + 1)
+
+        return Ok((out, err))
+
+    def close(self) -> None:
+        self._selector.close()
+
+        assert self._ps.stdin is not None
+        assert self._ps.stdout is not None
+        assert self._ps.stderr is not None
+        try:
+            self._ps.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._ps.wait()
+        self._ps.stdout.close()
+        self._ps.stderr.close()
+
+    def _start(self) -> None:
+        raw_env = getattr(os.environ, "_data", None)
+        self._raw_env = dict(raw_env) if raw_env is not None else None
+        self._env = dict(os.environ)
+        self._ps = sp.Popen(
+            ["bash"], stdin=sp.PIPE, stdout=sp.PIPE, stderr=sp.PIPE
+        )
+
+        assert self._ps.stdout is not None
+        assert self._ps.stderr is not None
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._ps.stdout, selectors.EVENT_READ, 1)
+        self._selector.register(self._ps.stderr, selectors.EVENT_READ, 2)
+
+    def _sync_env(self) -> str:
+        """Returns shell code that applies any os.environ changes to bash.
+
+        Names that bash cannot export are skipped, and errors (e.g. from
+        readonly variables) are silenced so they don't leak into the
+        command's STDERR.
+        """
+        # Decoding os.environ is slow enough to dwarf the cost of running a
+        # builtin, so we first compare the (already encoded) mapping that it
+        # wraps, which is almost always unchanged.
+        raw_env = getattr(os.environ, "_data", None)
+        if raw_env is not None and raw_env == self._raw_env:
+            return ""
+
+        self._raw_env = dict(raw_env) if raw_env is not None else None
+        env = dict(os.environ)
+        lines = []
+        for name in self._env.keys() - env.keys():
+            if self._ENV_NAME_RE.fullmatch(name):
+                lines.append("unset {} 2>/dev/null\n".format(name))
+
+        for name, value in env.items():
+            if self._env.get(name) != value and self._ENV_NAME_RE.fullmatch(
+                name
+            ):
+                lines.append(
+                    "export {} 2>/dev/null\n".format(
+                        shlex.quote(f"{name}={value}")
+                    )
+                )
+
+        self._env = env
+        return "".join(lines)
+
+    def _run(self, script: str) -> Tuple[int, bytes, bytes]:
+        assert self._ps.stdin is not None
+
+        sentinel = self._sentinel
+        framed_script = (
+            "{0}\n"
+            "printf '\\n%s %d\\n' {1} $?\n"
+            "printf '\\n%s\\n' {1} >&2\n"
+        ).format(script, sentinel)
+
+        try:
+            self._ps.stdin.write(framed_script.encode())
+            self._ps.stdin.flush()
+        except BrokenPipeError:
+            pass
+
+        out_marker = "\n{} ".format(sentinel).encode()
+        err_marker = "\n{}\n".format(sentinel).encode()
+        bufs = {1: bytearray(), 2: bytearray()}
+        returncode: Optional[int] = None
+        err_done = False
+
+        while returncode is None or not err_done:
+            for key, _ in self._selector.select():
+                fd = key.data
+                buf = bufs[fd]
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    # The shell has exited (e.g. the command was `exit 1`).
+                    return self._restart(), bytes(bufs[1]), bytes(bufs[2])
+
+                # We only need to search the new chunk (and enough of the
+                # old data to catch a marker split across two chunks).
+                start = max(0, len(buf) - len(out_marker) - 20)
+                buf += chunk
+                if fd == 1 and returncode is None:
+                    i = buf.find(out_marker, start)
+                    j = -1 if i == -1 else buf.find(b"\n", i + 1)
+                    if j != -1:
+                        returncode = int(buf[i + len(out_marker) : j])
+                        del buf[i:]
+                elif fd == 2 and not err_done:
+                    i = buf.find(err_marker, start)
+                    if i != -1:
+                        err_done = True
+                        del buf[i:]
+
+        return returncode, bytes(bufs[1]), bytes(bufs[2])
+
+    def _restart(self) -> int:
+        returncode = self._ps.wait()
+        self.close()
+        self._start()
+        return returncode if returncode != 0 else 1
+
+
+class ShellWorkerPool:
+    """A pool of ShellWorker objects that is safe to share between threads."""
+
+    def __init__(self, size: int = 4) -> None:
+        self._workers = [ShellWorker() for _ in range(size)]
+        self._idle: "queue.Queue[ShellWorker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def __enter__(self) -> "ShellWorkerPool":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        self.close()
+
+    def safe_popen(
+        self,
+        cmd_parts: Iterable[str],
+        *,
+        up: int = 0,
+        cwd: str = None,
+        env: Mapping[str, str] = None,
+    ) -> BResult[Tuple[str, str]]:
+        """Runs a command using the next idle ShellWorker.
+
+        Returns:
+            Ok((out, err)) if the command is successful.
+                OR
+            Err(BugyiError) otherwise.
+        """
+        worker = self._idle.get()
+        try:
+            return worker.safe_popen(cmd_parts, up=up + 1, cwd=cwd, env=env)
+        finally:
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.close()
+
+
+def _tail_string(
+    tail: Deque[str], count: int, full_path: Optional[str]
+) -> str:
+    omitted = count - len(tail)
+    if omitted <= 0:
+        return "\n".join(tail)
+
+    header = f"[... {omitted} earlier lines omitted"
+    if full_path is not None:
+        header += f"; full output saved to {full_path}"
+    header += " ...]"
+    return "\n".join([header, *tail])
+
+
+def _command_error(
+    returncode: Optional[int],
+    cmd_list: List[str],
+    out: str,
+    err: str,
+    *,
+    up: int = 0,
+) -> Err[Any, BugyiError]:
+    maybe_out = ""
+    if out:
+        maybe_out = "\n\n----- STDOUT\n{}".format(out)
+
+    maybe_err = ""
+    if err:
+        maybe_err = "\n\n----- STDERR\n{}".format(err)
+
+    return BErr(
+        "Command Failed (ec={}): {!r}{}{}".format(
+            returncode, cmd_list, maybe_out, maybe_err
+        ),
+        up=up + 1,
+    )
+
+
+class PopenCache:
+    """A TTL + LRU cache for the results of read-only commands.
+
+    Results are keyed on the command, its working directory, and the values
+    of the @env_vars environment variables. Only successful results are
+    cached.
+
+    Examples:
+        GIT_CACHE = PopenCache(ttl=30, disk=True)
+        safe_popen(["git", "rev-parse", "--show-toplevel"], cache=GIT_CACHE)
+
+    Args:
+        ttl: Number of seconds that a cached result remains valid for.
+        maxsize: Maximum number of results kept in memory.
+        env_vars: Names of the environment variables that the commands
+            using this cache depend on.
+        disk: If True, results are also stored on disk (under the XDG cache
+            directory) so they can be reused by later python processes.
+        name: Caches with different names never share results on disk.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 60,
+        maxsize: int = 256,
+        env_vars: Iterable[str] = (),
+        disk: bool = False,
+        name: str = "default",
+    ) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.env_vars = tuple(env_vars)
+        self.disk_dir: Optional[Path] = None
+        if disk:
+            cache_dir = xdg.get_base_dir("cache")
+            self.disk_dir = cache_dir / "bugyi" / "popen" / name
+
+        self._lock = threading.Lock()
+        # Maps cache keys to (expiration time, (out, err)) tuples.
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, str]]]" = (
+            OrderedDict()
+        )
+
+    def safe_popen(
+        self, cmd_parts: Iterable[str], *, up: int = 0, **kwargs: Any
+    ) -> BResult[Tuple[str, str]]:
+        """Cached version of safe_popen().
+
+        Returns:
+            Ok((out, err)) if the command is successful (or a cached result
+            for this command exists).
+                OR
+            Err(BugyiError) otherwise.
+        """
+        cmd_list = list(cmd_parts)
+        key = self._key(cmd_list, kwargs.get("cwd"), kwargs.get("env"))
+
+        out_err = self._get(key)
+        if out_err is not None:
+            return Ok(out_err)
+
+        out_err_r = safe_popen(cmd_list, up=up + 1, **kwargs)
+        if isinstance(out_err_r, Ok):
+            self._put(key, out_err_r.ok())
+        return out_err_r
+
+    def clear(self) -> None:
+        """Removes every cached result (both in memory and on disk)."""
+        with self._lock:
+            self._entries.clear()
+
+        if self.disk_dir is not None and self.disk_dir.is_dir():
+            for path in self.disk_dir.iterdir():
+                path.unlink(missing_ok=True)
+
+    def _key(
+        self,
+        cmd_list: List[str],
+        cwd: Optional[PathLike],
+        env: Optional[Mapping[str, str]],
+    ) -> str:
+        if env is None:
+            env = os.environ
+
+        key_parts = [
+            cmd_list,
+            os.path.abspath(os.getcwd() if cwd is None else cwd),
+            [[var, env.get(var)] for var in self.env_vars],
+        ]
+        return hashlib.sha256(json.dumps(key_parts).encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expiration, out_err = entry
+                if time.time() < expiration:
+                    self._entries.move_to_end(key)
+                    return out_err
+                del self._entries[key]
+
+        if self.disk_dir is None:
+            return None
+
+        path = self.disk_dir / key
+        try:
+            expiration, out, err = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if time.time() >= expiration:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+        self._put(key, (out, err), expiration=expiration, disk=False)
+        return (out, err)
+
+    def _put(
+        self,
+        key: str,
+        out_err: Tuple[str, str],
+        *,
+        expiration: float = None,
+        disk: bool = True,
+    ) -> None:
+        if expiration is None:
+            expiration = time.time() + self.ttl
+
+        with self._lock:
+            self._entries[key] = (expiration, out_err)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        if disk and self.disk_dir is not None:
+            # The disk tier is best-effort: failing to write to it must never
+            # make a successful command fail.
+            try:
+                self._put_disk(key, [expiration, *out_err])
+            except OSError as e:
+                log.debug("Unable to write PopenCache entry to disk: {}", e)
+
+    def _put_disk(self, key: str, entry: List[Any]) -> None:
+        assert self.disk_dir is not None
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write to a (unique) temporary file first so concurrent readers never
+        # see a partially written entry and concurrent writers never clobber
+        # each other's temporary files.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.disk_dir, prefix=f"{key}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps(entry))
+            os.replace(tmp_path, self.disk_dir / key)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class PopenRecord(NamedTuple):
+    """Statistics collected for a single command (see add_popen_hook()).
+
+    Attributes:
+        argv: The command that was run.
+        cwd: The directory the command was run in (None means the current
+            working directory).
+        wall_time: Wall-clock time in seconds.
+        user_time: User CPU time of the child process in seconds.
+        sys_time: System CPU time of the child process in seconds.
+        max_rss: Maximum resident set size of the child process (in KiB on
+            Linux, bytes on macOS).
+        out_bytes: Number of bytes written to STDOUT.
+        err_bytes: Number of bytes written to STDERR.
+        returncode: The command's exit code.
+    """
+
+    argv: List[str]
+    cwd: Optional[str]
+    wall_time: float
+    user_time: Optional[float]
+    sys_time: Optional[float]
+    max_rss: Optional[int]
+    out_bytes: int
+    err_bytes: int
+    returncode: int
+
+
+PopenHook = Callable[[PopenRecord], None]
+_POPEN_HOOKS: List[PopenHook] = []
+
+
+def add_popen_hook(hook: PopenHook) -> None:
+    """Registers a hook that is called after every command we run.
+
+    Hooks are called with a PopenRecord object for every command run by
+    safe_popen(), safe_popen_raw(), unsafe_popen() and run_many(). Commands
+    are only instrumented while at least one hook is registered.
+
+    See PopenHistogram, JsonLinesSink, and log_popen_record() for
+    ready-made hooks.
+    """
+    _POPEN_HOOKS.append(hook)
+
+
+def remove_popen_hook(hook: PopenHook) -> None:
+    """Unregisters a hook that was registered using add_popen_hook()."""
+    _POPEN_HOOKS.remove(hook)
+
+
+def _popen(cmd_list: List[str], **kwargs: Any) -> sp.Popen:
+    if _POPEN_HOOKS:
+        return _InstrumentedPopen(cmd_list, **kwargs)
+    return sp.Popen(cmd_list, **kwargs)
+
+
+class _InstrumentedPopen(sp.Popen):
+    """
+    Popen subclass that reaps its child using os.wait4(), which (unlike
+    os.waitpid()) gives us the child's resource usage.
+    """
+
+    def __init__(self, args: List[str], **kwargs: Any) -> None:
+        self._bugyi_cwd: Optional[str] = kwargs.get("cwd")
+        self._bugyi_rusage: Optional[resource.struct_rusage] = None
+        self._bugyi_end_time: Optional[float] = None
+        self._bugyi_start_time = time.perf_counter()
+        super().__init__(args, **kwargs)
+
+    def _try_wait(self, wait_flags: int) -> Tuple[int, int]:
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return super()._try_wait(wait_flags)  # type: ignore
+
+        if pid != 0:
+            self._bugyi_end_time = time.perf_counter()
+            self._bugyi_rusage = rusage
+        return pid, sts
+
+    def run_hooks(self, proc: "DoneProcess") -> None:
+        end_time = self._bugyi_end_time or time.perf_counter()
+        rusage = self._bugyi_rusage
+
+        cwd = self._bugyi_cwd
+        record = PopenRecord(
+            argv=proc.cmd_list,
+            cwd=None if cwd is None else str(cwd),
+            wall_time=end_time - self._bugyi_start_time,
+            user_time=None if rusage is None else rusage.ru_utime,
+            sys_time=None if rusage is None else rusage.ru_stime,
+            max_rss=None if rusage is None else rusage.ru_maxrss,
+            out_bytes=len(proc.raw_out),
+            err_bytes=len(proc.raw_err),
+            returncode=proc.returncode,
+        )
+
+        for hook in list(_POPEN_HOOKS):
+            try:
+                hook(record)
+            except Exception:
+                log.exception("Popen hook failed: {!r}", hook)
+
+
+class PopenHistogram:
+    """Popen hook that aggregates wall-clock times by program.
+
+    Args:
+        print_at_exit: If True, summary() is printed to STDERR when the
+            python interpreter exits.
+    """
+
+    def __init__(self, *, print_at_exit: bool = True) -> None:
+        self._lock = threading.Lock()
+        self._records: Dict[str, List[PopenRecord]] = defaultdict(list)
+        if print_at_exit:
+            atexit.register(lambda: print(self.summary(), file=sys.stderr))
+
+    def __call__(self, record: PopenRecord) -> None:
+        prog = os.path.basename(record.argv[0]) if record.argv else ""
+        with self._lock:
+            self._records[prog].append(record)
+
+    def summary(self) -> str:
+        """
+        Returns:
+            Per-program statistics along with a histogram of wall-clock times
+            (using power-of-two millisecond buckets).
+        """
+        lines = ["----- Subprocess Summary"]
+        with self._lock:
+            records_by_prog = sorted(
+                self._records.items(),
+                key=lambda kv: -sum(r.wall_time for r in kv[1]),
+            )
+
+            for prog, records in records_by_prog:
+                wall = sum(r.wall_time for r in records)
+                cpu = sum(
+                    (r.user_time or 0.0) + (r.sys_time or 0.0) for r in records
+                )
+                max_rss = max(r.max_rss or 0 for r in records)
+                failed = sum(1 for r in records if r.returncode != 0)
+                lines.append(
+                    f"{prog}: count={len(records)} failed={failed}"
+                    f" wall={wall:.3f}s cpu={cpu:.3f}s"
+                    f" mean={wall / len(records) * 1000:.2f}ms"
+                    f" max_rss={max_rss}"
+                )
+
+                buckets: Dict[int, int] = defaultdict(int)
+                for r in records:
+                    ms = r.wall_time * 1000
+                    buckets[0 if ms < 1 else math.ceil(math.log2(ms))] += 1
+                lines.append(
+                    "  "
+                    + " ".join(
+                        f"<{2 ** b}ms:{n}" for b, n in sorted(buckets.items())
+                    )
+                )
+
+        return "\n".join(lines)
+
+
+def log_popen_record(record: PopenRecord) -> None:
+    """Popen hook that logs every command using loguru (at the TRACE level)."""
+    log.trace(
+        "Ran command (ec={}) in {:.3f}s (user={}, sys={}, max_rss={},"
+        " out_bytes={}, err_bytes={}, cwd={!r}): {!r}",
+        record.returncode,
+        record.wall_time,
+        record.user_time,
+        record.sys_time,
+        record.max_rss,
+        record.out_bytes,
+        record.err_bytes,
+        record.cwd,
+        record.argv,
+    )
+
+
+class JsonLinesSink:
+    """Popen hook that appends every PopenRecord to a JSON-lines file.
+
+    Args:
+        path (opt): The JSON-lines file. Defaults to 'popen.jsonl' in the
+            calling script's XDG cache directory.
+    """
+
+    def __init__(self, path: PathLike = None, *, up: int = 0) -> None:
+        if path is None:
+            path = xdg.init_full_dir("cache", up=up + 1) / "popen.jsonl"
+
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, record: PopenRecord) -> None:
+        line = json.dumps(record._asdict()) + "\n"
+        with self._lock:
+            with self.path.open("a") as f:
+                f.write(line)
+
+
 def create_pidfile(*, up: int = 0) -> None:
     """Writes PID to file, which is created if necessary.
 
@@ -110,7 +1296,91 @@ class StillAliveException(Exception):
 
 
 def command_exists(cmd: str) -> bool:
-    ps = sp.Popen(
-        "hash {}".format(cmd), shell=True, stdout=sp.PIPE, stderr=sp.PIPE
-    )
-    return ps.wait() == 0
+    """
+    Returns:
+        True iff @cmd is an executable that can be found on the $PATH (or is a
+        path to an executable file).
+    """
+    return which(cmd) is not None
+
+
+def commands_exist(cmds: Iterable[str]) -> Dict[str, bool]:
+    """Batch version of command_exists() (e.g. for startup checks).
+
+    Returns:
+        A dictionary mapping each command in @cmds to whether or not that
+        command exists.
+    """
+    _PATH_INDEX.refresh()
+    return {cmd: _PATH_INDEX.which(cmd) is not None for cmd in cmds}
+
+
+def which(cmd: str) -> Optional[str]:
+    """In-process version of the `which` command.
+
+    Returns:
+        The full path to the @cmd executable or None if @cmd cannot be found.
+    """
+    _PATH_INDEX.refresh()
+    return _PATH_INDEX.which(cmd)
+
+
+class _ExecutableIndex:
+    """
+    Index of the files contained in each $PATH directory.
+
+    The index is rebuilt when $PATH changes. A single directory's listing is
+    rebuilt when that directory's mtime changes.
+    """
+
+    def __init__(self) -> None:
+        self._path: Optional[str] = None
+        self._dirs: List[str] = []
+        # Maps $PATH directories to (mtime, set of file names) tuples.
+        self._listings: Dict[str, Tuple[float, FrozenSet[str]]] = {}
+
+    def refresh(self) -> None:
+        path = os.environ.get("PATH", os.defpath)
+        if path != self._path:
+            self._path = path
+            self._dirs = list(dict.fromkeys(d or "." for d in path.split(":")))
+            self._listings = {}
+
+        for directory in self._dirs:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                self._listings.pop(directory, None)
+                continue
+
+            listing = self._listings.get(directory)
+            if listing is not None and listing[0] == mtime:
+                continue
+
+            try:
+                names = frozenset(os.listdir(directory))
+            except OSError:
+                names = frozenset()
+            self._listings[directory] = (mtime, names)
+
+    def which(self, cmd: str) -> Optional[str]:
+        if "/" in cmd:
+            return cmd if _is_executable(cmd) else None
+
+        for directory in self._dirs:
+            listing = self._listings.get(directory)
+            if listing is None or cmd not in listing[1]:
+                continue
+
+            full_path = os.path.join(directory, cmd)
+            if _is_executable(full_path):
+                return full_path
+
+        return None
+
+
+def _is_executable(path: str) -> bool:
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+_PATH_INDEX = _ExecutableIndex()
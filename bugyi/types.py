@@ -8,7 +8,9 @@ from typing import Any, Callable, List, NoReturn, Type, TypeVar, Union
 
 C = TypeVar("C", bound=Callable)
 E = TypeVar("E", bound=Exception)
+F = TypeVar("F", bound=Exception)
 T = TypeVar("T")
+U = TypeVar("U")
 
 DateLike = Union[str, dt.date, dt.datetime]
 PathLike = Union[str, Path]
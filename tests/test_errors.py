@@ -0,0 +1,206 @@
+import io
+import pickle
+import time
+from typing import List
+
+from bugyi.errors import (
+    BErr,
+    BugyiError,
+    ErrorAggregator,
+    ErrorSummary,
+    SerializedError,
+    chain_errors,
+)
+
+
+def test_inspector_location() -> None:
+    e = BugyiError("Something went wrong.")
+    line_number = e.inspector.line_number
+
+    assert e.inspector.function_name == "test_inspector_location"
+    assert e.inspector.module_name.endswith("test_errors")
+    assert 'BugyiError("Something went wrong.")' in e.inspector.lines
+    assert f"::test_inspector_location::{line_number}{{" in repr(e)
+
+
+def test_inspector_up() -> None:
+    def helper() -> BErr:
+        return BErr("Something went wrong.", up=1)
+
+    e = helper().err()
+    assert e.inspector.function_name == "test_inspector_up"
+    assert "helper()" in e.inspector.lines
+
+
+def test_report_rendering() -> None:
+    e = BugyiError("Top-level error.", cause=ValueError("Low-level error."))
+
+    rendered = str(e)
+    assert rendered == str(e.report())
+    assert e.render() is e.render()
+    assert "Low-level error." in rendered
+    assert rendered.startswith("\n+---")
+    assert rendered.endswith("---+")
+    assert all(len(line) == 82 for line in rendered.split("\n")[1:])
+
+    fp = io.StringIO()
+    e.write_report(fp, width=60)
+    assert fp.getvalue() == e.render(width=60) == str(e.report(width=60))
+
+    # The cached report is invalidated when the error chain changes.
+    chain_errors(e, KeyError("Lowest-level error."))
+    assert "Lowest-level error." in str(e)
+
+
+def test_report_cache_invalidation() -> None:
+    e = BugyiError("Top-level error.")
+    for i in range(200):
+        # The old cause is freed here, so its ID is likely to be reused.
+        e.__cause__ = None
+        e.__cause__ = ValueError(f"cause #{i}")
+        assert f"cause #{i}" in str(e)
+
+    for i in range(10):
+        e.args = (f"message #{i}",)
+        assert f"message #{i}" in str(e)
+
+    assert e.render() is e.render()
+
+
+class _CustomError(BugyiError):
+    pass
+
+
+class _CodedError(BugyiError):
+    def __init__(self, emsg: str, code: int) -> None:
+        super().__init__(emsg)
+        self.code = code
+        self.extra = {"objects": [object]}
+
+
+def test_serialization_round_trip() -> None:
+    try:
+        raise KeyError("missing")
+    except KeyError as e:
+        low_level = e
+
+    middle = _CustomError("Middle error.", cause=low_level)
+    e = BugyiError("Top-level error.", cause=middle)
+
+    for copy in [
+        BugyiError.from_dict(e.to_dict()),
+        BugyiError.from_bytes(e.to_bytes()),
+        pickle.loads(pickle.dumps(e)),
+    ]:
+        assert str(copy) == str(e)
+        assert repr(copy) == repr(e)
+
+        chain = list(copy)
+        assert type(chain[1]) is _CustomError
+        assert isinstance(chain[2], SerializedError)
+        assert chain[2].class_name == "KeyError"
+        assert "raise KeyError" in chain[2].text
+
+
+def test_serialization_unknown_class() -> None:
+    e = BugyiError("Some error.")
+    error_dict = e.to_dict()
+    error_dict["chain"][0]["class"] = "no_such_module:GoneError"
+
+    copy = BugyiError.from_dict(error_dict)
+    assert type(copy).__name__ == "GoneError"
+    assert isinstance(copy, BugyiError)
+    assert repr(copy) == repr(e).replace("BugyiError", "GoneError")
+
+
+def test_fingerprint() -> None:
+    def make_error(msg: str) -> BugyiError:
+        return BugyiError(msg, cause=KeyError(msg))
+
+    e1 = make_error("foo")
+    e2 = make_error("bar")
+    assert e1.fingerprint == e2.fingerprint
+    assert e1.fingerprint != BugyiError("foo").fingerprint
+    assert e1.fingerprint != BugyiError("foo", cause=e1.__cause__).fingerprint
+    assert make_error("foo").fingerprint != BugyiError(
+        "foo", cause=ValueError()
+    ).fingerprint
+    assert BugyiError.from_bytes(e1.to_bytes()).fingerprint == e1.fingerprint
+
+
+def test_error_aggregator() -> None:
+    now = 0.0
+    reported: List[BugyiError] = []
+    summaries: List[ErrorSummary] = []
+    errors = ErrorAggregator(
+        limit=2,
+        window=10.0,
+        report=reported.append,
+        summarize=summaries.append,
+        clock=lambda: now,
+    )
+
+    def make_error(i: int) -> BugyiError:
+        return BugyiError(f"Error #{i}")
+
+    assert [errors.add(make_error(i)) for i in range(1000)] == [
+        True,
+        True,
+    ] + [False] * 998
+    other = BugyiError("Other error.")
+    assert errors.add(other)
+    assert len(reported) == 3
+    assert not summaries
+
+    now = 10.0
+    assert errors.add(make_error(1000))
+    assert len(summaries) == 1
+    fingerprint, suppressed, total, window, last_error = summaries[0]
+    assert fingerprint == reported[0].fingerprint
+    assert (suppressed, total, window) == (998, 1000, 10.0)
+    assert last_error.args[0] == "Error #999"
+
+    assert errors.add(make_error(1001))
+    assert errors.counts() == {
+        reported[0].fingerprint: 1002,
+        other.fingerprint: 1,
+    }
+
+    with errors:
+        assert not errors.add(make_error(1002))
+    assert len(summaries) == 2
+    assert summaries[1].suppressed == 1
+
+
+def test_error_aggregator_summarizes_without_add() -> None:
+    summaries: List[ErrorSummary] = []
+    errors = ErrorAggregator(
+        limit=1, window=0.05, report=lambda e: None, summarize=summaries.append
+    )
+    for i in range(3):
+        errors.add(BugyiError(f"Error #{i}"))
+
+    # The burst has stopped, so nothing calls add() again.
+    deadline = time.monotonic() + 5.0
+    while not summaries and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert [summary.suppressed for summary in summaries] == [2]
+    errors.close()
+
+
+def test_serialization_extra_attrs() -> None:
+    e = BugyiError("Top-level error.", cause=_CodedError("Coded.", 42))
+    e.add_note("A note.")
+
+    for copy in [
+        BugyiError.from_dict(e.to_dict()),
+        BugyiError.from_bytes(e.to_bytes()),
+        pickle.loads(pickle.dumps(e)),
+    ]:
+        assert copy.__notes__ == ["A note."]
+        coded = copy.__cause__
+        assert isinstance(coded, _CodedError)
+        assert coded.code == 42
+        assert coded.extra == {"objects": [object]}
+        assert str(copy) == str(e)
@@ -0,0 +1,377 @@
+import os
+from pathlib import Path
+import subprocess as sp
+from typing import Any, Iterator, List
+
+import pytest
+
+from bugyi import git_tools, subprocess as bsp
+from bugyi.errors import BugyiError
+from bugyi.result import Err, Ok
+
+
+def _git(*args: str, cwd: Path) -> str:
+    return sp.check_output(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+        cwd=cwd,
+        text=True,
+    ).strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    repo_dir = tmp_path / "repo"
+    repo_dir.mkdir()
+    _git("init", "-q", "-b", "main", cwd=repo_dir)
+    _git("commit", "-q", "--allow-empty", "-m", "Initial commit", cwd=repo_dir)
+    _git("branch", "feature/foo", cwd=repo_dir)
+
+    (repo_dir / "subdir").mkdir()
+    monkeypatch.chdir(repo_dir / "subdir")
+    yield repo_dir
+
+
+def test_top_level_dir(repo: Path) -> None:
+    assert git_tools.discover_repo() is not None
+    assert git_tools.top_level_dir() == Ok(str(repo))
+    assert git_tools.top_level_dir(str(repo / "subdir")) == Ok(str(repo))
+
+
+def test_current_branch(repo: Path) -> None:
+    assert git_tools.current_branch() == Ok("main")
+
+    _git("checkout", "-q", "feature/foo", cwd=repo)
+    assert git_tools.current_branch() == Ok("feature/foo")
+
+    _git("checkout", "-q", "--detach", cwd=repo)
+    assert git_tools.current_branch() == Ok("")
+
+
+@pytest.mark.parametrize("pack_refs", [False, True])
+def test_local_branch_exists(repo: Path, pack_refs: bool) -> None:
+    if pack_refs:
+        _git("pack-refs", "--all", cwd=repo)
+        assert not (repo / ".git" / "refs" / "heads" / "main").exists()
+
+    assert git_tools.local_branch_exists("main") == Ok(True)
+    assert git_tools.local_branch_exists("feature/foo") == Ok(True)
+    assert git_tools.local_branch_exists("feature") == Ok(False)
+    assert git_tools.local_branch_exists("bar") == Ok(False)
+    assert git_tools.local_branch_exists("feat*") == Ok(True)
+
+
+def test_worktree(repo: Path, tmp_path: Path) -> None:
+    worktree = tmp_path / "worktree"
+    _git("worktree", "add", "-q", str(worktree), "-b", "wt", cwd=repo)
+    _git("pack-refs", "--all", cwd=repo)
+    os.chdir(worktree)
+
+    paths = git_tools.discover_repo()
+    assert paths is not None
+    assert paths.common_dir == str(repo / ".git")
+    assert git_tools.top_level_dir() == Ok(str(worktree))
+    assert git_tools.current_branch() == Ok("wt")
+    assert git_tools.local_branch_exists("main") == Ok(True)
+
+
+def test_nested_bare_repo(repo: Path) -> None:
+    bare = repo / "inner.git"
+    _git("init", "-q", "--bare", "-b", "other", str(bare), cwd=repo)
+    os.chdir(bare)
+
+    assert git_tools.discover_repo() is None
+    assert isinstance(git_tools.top_level_dir(), Err)
+    assert git_tools.current_branch() == Ok("other")
+    assert git_tools.local_branch_exists("main") == Ok(False)
+
+
+@pytest.mark.parametrize(
+    "config,supported",
+    [
+        ("[core]\n\tbare = false\n", True),
+        ("[core]\n\tbare=true\n", False),
+        ("[CORE]\n\tBare = yes\n", False),
+        ("[core]\n\tbare\n", False),
+        ("[core]\n\tworktree = /tmp\n", False),
+        ("[extensions]\n\tworktreeConfig = true\n", False),
+        ("[include]\n\tpath = missing.config\n", True),
+        ("[include]\n\tpath = config\n", False),
+        ('[includeIf "onbranch:main"]\n\tpath = other\n', False),
+        ('[remote "worktree"]\n\turl = foo\n', True),
+    ],
+)
+def test_discover_repo_config(
+    repo: Path, config: str, supported: bool
+) -> None:
+    with open(repo / ".git" / "config", "a") as f:
+        f.write(config)
+
+    assert (git_tools.discover_repo() is not None) is supported
+
+
+def test_fallback(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("GIT_DIR", str(repo / ".git"))
+    assert git_tools.discover_repo() is None
+    assert git_tools.current_branch() == Ok("main")
+    assert git_tools.local_branch_exists("feature/foo") == Ok(True)
+
+
+def test_git_batch_session(repo: Path) -> None:
+    (repo / "foo.txt").write_text("foo\n")
+    _git("add", "foo.txt", cwd=repo)
+    _git("commit", "-q", "-m", "Add foo.txt", cwd=repo)
+    blob_oid = _git("rev-parse", "HEAD:foo.txt", cwd=repo)
+
+    with git_tools.GitBatchSession() as session:
+        session.PIPELINE_DEPTH = 3
+        revs = ["HEAD", "HEAD:foo.txt", "does-not-exist"] * 100
+        results = list(session.infos(revs))
+        assert len(results) == 300
+        assert results[0].unwrap().type == "commit"
+        assert results[1] == Ok(git_tools.GitObjectInfo(blob_oid, "blob", 4))
+        assert isinstance(results[2], Err)
+
+        assert session.exists("HEAD:foo.txt") == Ok(True)
+        assert session.exists("HEAD:bar.txt") == Ok(False)
+        assert session.exists("HEAD:no such.txt") == Ok(False)
+        assert isinstance(session.info("HEAD:a b c"), Err)
+        assert session.read("HEAD:foo.txt") == Ok(
+            (git_tools.GitObjectInfo(blob_oid, "blob", 4), b"foo\n")
+        )
+        assert session.read("main:foo.txt").unwrap()[1] == b"foo\n"
+        assert isinstance(session.info("bad\nrev"), Err)
+
+
+def test_git_batch_session_early_exit(repo: Path) -> None:
+    _git("commit", "-q", "--allow-empty", "-m", "Second commit", cwd=repo)
+    head_oid = _git("rev-parse", "HEAD", cwd=repo)
+
+    with git_tools.GitBatchSession() as session:
+        for _ in session.infos(["HEAD~1", "HEAD", "HEAD~1"]):
+            break
+        assert session.info("HEAD").unwrap().oid == head_oid
+
+        # An unfinished iterator never steals responses from newer requests.
+        infos = session.infos(["HEAD~1", "HEAD~1"])
+        next(infos)
+        assert session.info("HEAD").unwrap().oid == head_oid
+        assert isinstance(next(infos), Err)
+        assert session.info("HEAD").unwrap().oid == head_oid
+
+
+def test_remote_branches_exist(repo: Path, tmp_path: Path) -> None:
+    bare = tmp_path / "bare.git"
+    _git("clone", "-q", "--bare", str(repo), str(bare), cwd=tmp_path)
+    _git("remote", "add", "origin", f"file://{bare}", cwd=repo)
+
+    branches = ["main", "feature/foo", "foo", "bar"]
+    assert git_tools.remote_branches_exist("origin", branches) == Ok(
+        {"main": True, "feature/foo": True, "foo": False, "bar": False}
+    )
+
+    _git("push", "-q", "origin", "main:bar", cwd=repo)
+    assert git_tools.remote_branches_exist("origin", ["bar"]) == Ok(
+        {"bar": False}
+    )
+    assert git_tools.remote_branches_exist("origin", ["bar"], ttl=0) == Ok(
+        {"bar": True}
+    )
+
+    assert isinstance(git_tools.remote_branches_exist("nope", ["main"]), Err)
+
+
+@pytest.mark.parametrize("op", ["fetch", "pull"])
+def test_sync_repos(repo: Path, tmp_path: Path, op: git_tools.SyncOp) -> None:
+    bare = tmp_path / "bare.git"
+    _git("clone", "-q", "--bare", str(repo), str(bare), cwd=tmp_path)
+
+    clones = []
+    for i in range(5):
+        clone = tmp_path / f"clone{i}"
+        _git("clone", "-q", f"file://{bare}", str(clone), cwd=tmp_path)
+        clones.append(clone)
+
+    _git("commit", "-q", "--allow-empty", "-m", "New commit", cwd=repo)
+    _git("push", "-q", str(bare), "main", cwd=repo)
+
+    not_a_repo = tmp_path / "not_a_repo"
+    not_a_repo.mkdir()
+
+    sync = git_tools.sync_repos([*clones, not_a_repo], op, max_concurrency=3)
+    for clone in clones:
+        assert isinstance(sync.results[str(clone)], Ok)
+        ref = "HEAD" if op == "pull" else "origin/main"
+        assert _git("rev-parse", ref, cwd=clone) == _git(
+            "rev-parse", "HEAD", cwd=repo
+        )
+
+    assert isinstance(sync.results[str(not_a_repo)], Err)
+    assert sync.stats.wall_time > 0
+
+
+def test_git_repo(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    git_repo = git_tools.GitRepo.discover().unwrap()
+    assert git_repo.top_level_dir() == str(repo)
+    assert git_repo.current_branch() == Ok("main")
+    assert git_repo.remotes() == Ok([])
+    assert git_repo.local_branches() == Ok(frozenset(["main", "feature/foo"]))
+
+    calls: List[List[str]] = []
+    safe_popen = bsp.safe_popen
+
+    def spy_safe_popen(cmd: List[str], **kwargs: Any) -> Any:
+        calls.append(cmd)
+        return safe_popen(cmd, **kwargs)
+
+    monkeypatch.setattr(bsp, "safe_popen", spy_safe_popen)
+
+    # Cached values should NOT require us to run git.
+    assert git_repo.remotes() == Ok([])
+    assert calls == []
+
+    _git("checkout", "-q", "-b", "feature/bar", cwd=repo)
+    _git("remote", "add", "origin", "https://example.com/repo.git", cwd=repo)
+    assert git_repo.current_branch() == Ok("feature/bar")
+    assert git_repo.local_branch_exists("feature/bar") == Ok(True)
+    assert git_repo.remotes() == Ok(
+        [git_tools.GitRemote("origin", "https://example.com/repo.git")]
+    )
+    assert calls == []
+
+    _git("pack-refs", "--all", cwd=repo)
+    _git("branch", "-q", "-D", "feature/foo", cwd=repo)
+    assert git_repo.local_branches() == Ok(frozenset(["main", "feature/bar"]))
+
+
+def test_git_repo_remotes_other_config_files(
+    repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+    _git("config", "include.path", "extra.config", cwd=repo)
+    git_repo = git_tools.GitRepo.discover().unwrap()
+    assert git_repo.remotes() == Ok([])
+
+    url = "https://example.com/{}.git"
+    (tmp_path / ".gitconfig").write_text(
+        '[remote "global"]\n\turl = {}\n'.format(url.format("global"))
+    )
+    assert git_repo.remotes() == Ok(
+        [git_tools.GitRemote("global", url.format("global"))]
+    )
+
+    (repo / ".git" / "extra.config").write_text(
+        '[remote "included"]\n\turl = {}\n'.format(url.format("included"))
+    )
+    assert [r.name for r in git_repo.remotes().unwrap()] == [
+        "global",
+        "included",
+    ]
+
+    (repo / ".git" / "extra.config").write_text("")
+    assert [r.name for r in git_repo.remotes().unwrap()] == ["global"]
+
+
+def test_iter_commits(repo: Path) -> None:
+    _git(
+        "commit",
+        "-q",
+        "--allow-empty",
+        "-m",
+        "Subject\n\nBody\n\nMore",
+        cwd=repo,
+    )
+
+    commits = list(git_tools.iter_commits())
+    assert len(commits) == 2
+    assert commits[0].oid == _git("rev-parse", "HEAD", cwd=repo)
+    assert commits[0].parents == (commits[1].oid,)
+    assert commits[0].subject == "Subject"
+    assert commits[0].body == "Body\n\nMore"
+    assert commits[0].author_name == "test"
+    assert isinstance(commits[0].commit_time, int)
+    assert commits[1].parents == ()
+
+    commits = list(git_tools.iter_commits("HEAD~1..HEAD", fields=["subject"]))
+    assert commits == [git_tools.GitCommit(commits[0].oid, subject="Subject")]
+
+    with pytest.raises(BugyiError):
+        list(git_tools.iter_commits("does-not-exist"))
+
+
+def test_status(repo: Path) -> None:
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        (repo / name).write_text(f"{name}\n")
+    _git("add", "a.txt", "b.txt", cwd=repo)
+    _git("commit", "-q", "-m", "Add files", cwd=repo)
+
+    (repo / "a.txt").write_text("changed\n")
+    _git("mv", "b.txt", "new b.txt", cwd=repo)
+
+    assert sorted(git_tools.status()) == [
+        git_tools.GitStatusEntry("changed", ".M", "a.txt"),
+        git_tools.GitStatusEntry("renamed", "R.", "new b.txt", "b.txt"),
+        git_tools.GitStatusEntry("untracked", "??", "c.txt"),
+    ]
+    assert list(git_tools.status(untracked=False)) == [
+        git_tools.GitStatusEntry("changed", ".M", "a.txt"),
+        git_tools.GitStatusEntry("renamed", "R.", "new b.txt", "b.txt"),
+    ]
+
+
+def test_status_non_utf8_path(repo: Path) -> None:
+    raw_name = b"caf\xe9.txt"
+    with open(os.path.join(os.fsencode(repo), raw_name), "w") as f:
+        f.write("foo\n")
+
+    (entry,) = git_tools.status()
+    assert entry.kind == "untracked"
+    assert os.fsencode(entry.path) == raw_name
+    assert os.path.exists(os.path.join(str(repo), entry.path))
+
+
+def test_remotes(
+    repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+    (tmp_path / ".gitconfig").write_text(
+        '[remote "global"]\n\turl = https://example.com/global.git\n'
+    )
+    (repo / ".git" / "extra.config").write_text(
+        '[remote "included"]\n'
+        '\turl = "https://example.com/included.git" # comment\n'
+    )
+
+    _git("remote", "add", "b", "https://example.com/b.git", cwd=repo)
+    _git("remote", "add", "a", "https://example.com/a.git", cwd=repo)
+    _git("remote", "set-url", "--add", "a", "https://a2.example.com", cwd=repo)
+    for i in [1, 2]:
+        url = f"ssh://git@example.com/a{i}.git"
+        _git("remote", "set-url", "--add", "--push", "a", url, cwd=repo)
+    _git("config", "include.path", "extra.config", cwd=repo)
+
+    paths = git_tools.discover_repo()
+    assert paths is not None
+    assert git_tools._read_config_remotes(paths) is not None
+
+    expected = git_tools._git_remotes().unwrap()
+    assert [r.name for r in expected] == [
+        "a",
+        "a",
+        "a",
+        "b",
+        "global",
+        "included",
+    ]
+    assert git_tools.remotes() == Ok(expected)
+
+    _git(
+        "config",
+        "url.https://mirror/.insteadOf",
+        "https://example.com/",
+        cwd=repo,
+    )
+    assert git_tools._read_config_remotes(paths) is None
+    assert git_tools.remotes() == git_tools._git_remotes()
+    assert git_tools.remotes().unwrap()[0].url == "https://mirror/a.git"
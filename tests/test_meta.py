@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from bugyi import meta
+
+
+@pytest.fixture
+def pypath(tmp_path: Path) -> Iterator[Path]:
+    pkg_dir = tmp_path / "foo" / "bar"
+    pkg_dir.mkdir(parents=True)
+    (pkg_dir / "baz.py").touch()
+
+    sys.path.insert(0, str(tmp_path))
+    yield tmp_path.resolve()
+    sys.path.remove(str(tmp_path))
+
+
+def test_path_to_module(pypath: Path) -> None:
+    path = str(pypath / "foo" / "bar" / "baz.py")
+    assert meta._path_to_module(path) == "foo.bar.baz"
+
+
+def test_path_to_module_longest_prefix(pypath: Path) -> None:
+    path = str(pypath / "foo" / "bar" / "baz.py")
+    sys.path.insert(0, str(pypath / "foo"))
+    try:
+        assert meta._path_to_module(path) == "bar.baz"
+    finally:
+        sys.path.remove(str(pypath / "foo"))
+
+    assert meta._path_to_module(path) == "foo.bar.baz"
@@ -0,0 +1,356 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+import os
+import pickle
+import threading
+import time
+from typing import Iterator, List, Tuple
+
+import pytest
+
+from bugyi.errors import BErr
+from bugyi.result import (
+    Err,
+    Ok,
+    CacheStats,
+    Result,
+    ResultBatch,
+    cached_result,
+    collect,
+    force_all,
+    partition,
+    return_async_lazy_result,
+    return_lazy_result,
+)
+
+
+def test_no_instance_dict() -> None:
+    for result in [Ok(1), Ok(None), Err(ValueError()), BErr("Oops!")]:
+        assert not hasattr(result, "__dict__")
+
+
+def test_ok_none_singleton() -> None:
+    assert Ok(None) is Ok(None)
+    assert Ok(_value=None) is Ok(None)
+    assert pickle.loads(pickle.dumps(Ok(None))) is Ok(None)
+    assert Ok(1) is not Ok(1)
+
+
+def test_frozen() -> None:
+    with pytest.raises(FrozenInstanceError):
+        Ok(1)._value = 2  # type: ignore
+
+    with pytest.raises(FrozenInstanceError):
+        del Err(ValueError())._error  # type: ignore
+
+
+def test_bool_is_an_error() -> None:
+    for result in [Ok(1), Err(ValueError())]:
+        with pytest.raises(ValueError):
+            bool(result)
+
+
+@pytest.mark.parametrize(
+    "left,right,equal",
+    [
+        (Ok(1), Ok(1), True),
+        (Ok(1), Ok(2), False),
+        (Ok(1), Err(1), False),
+        (Err("foo"), Err("foo"), True),
+        (Ok(float("nan")), Ok(float("nan")), False),
+    ],
+)
+def test_equality(left: object, right: object, equal: bool) -> None:
+    assert (left == right) is equal
+    if equal:
+        assert hash(left) == hash(right)
+
+
+def test_repr_and_pickle() -> None:
+    assert repr(Ok(1)) == "Ok(_value=1)"
+    assert repr(Err("foo")) == "Err(_error='foo')"
+
+    for result in [Ok([1, 2]), Err("foo")]:
+        assert pickle.loads(pickle.dumps(result)) == result
+
+    berr = pickle.loads(pickle.dumps(BErr("Oops!")))
+    assert isinstance(berr, BErr)
+    assert berr.err().args[0] == "Oops!"
+
+
+def test_combinators() -> None:
+    def half(x: int) -> Result[int, ValueError]:
+        if x % 2:
+            return Err(ValueError(f"{x} is odd"))
+        return Ok(x // 2)
+
+    assert Ok(2).map(str) == Ok("2")
+    assert Ok(4).and_then(half).and_then(half) == Ok(1)
+    assert Ok(4).map_err(str) == Ok(4)
+
+    err = Ok(3).and_then(half).and_then(half).map(str)
+    assert isinstance(err, Err)
+    assert err.map_err(str) == Err("3 is odd")
+
+    berr = BErr("Oops!")
+    assert berr.map(str) is berr
+    assert berr.and_then(half) is berr
+
+
+def test_lazy_combinators() -> None:
+    calls = []
+
+    @return_lazy_result
+    def lazy_half(x: int) -> Result[int, ValueError]:
+        calls.append(x)
+        return Ok(x // 2)
+
+    lazy = lazy_half(8).map(lambda x: x + 1).and_then(lazy_half)
+    assert calls == []
+    assert lazy.unwrap() == 2
+    assert calls == [8, 5]
+
+
+def test_collect() -> None:
+    consumed = []
+
+    def results(n: int, bad: int = None) -> Iterator[Result[int, str]]:
+        for i in range(n):
+            consumed.append(i)
+            yield Err(str(i)) if i == bad else Ok(i)
+
+    assert collect(results(5)) == Ok([0, 1, 2, 3, 4])
+    assert collect([]) == Ok([])
+
+    consumed.clear()
+    assert collect(results(1_000_000, bad=2)) == Err("2")
+    assert consumed == [0, 1, 2]
+
+
+def test_partition() -> None:
+    oks, errs = partition(
+        Err(i) if i % 3 == 0 else Ok(i) for i in range(10)  # type: ignore
+    )
+    assert oks == [1, 2, 4, 5, 7, 8]
+    assert errs == [0, 3, 6, 9]
+
+
+@return_lazy_result
+def _lazy_pid(x: int) -> Result[Tuple[int, int], ValueError]:
+    return Ok((x, os.getpid()))
+
+
+def test_force_all_threads() -> None:
+    barrier = threading.Barrier(4, timeout=10)
+
+    @return_lazy_result
+    def wait(x: int) -> Result[int, ValueError]:
+        # Deadlocks (and then times out) unless all 4 run concurrently.
+        barrier.wait()
+        return Ok(x)
+
+    lazy_results = [wait(i) for i in range(4)]
+    assert force_all(lazy_results) == [Ok(i) for i in range(4)]
+    assert [lazy.result() for lazy in lazy_results] == [
+        Ok(i) for i in range(4)
+    ]
+
+
+def test_force_all_processes() -> None:
+    lazy_results = [_lazy_pid(i) for i in range(4)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = force_all(lazy_results + lazy_results, executor=executor)
+
+    assert [r.unwrap()[0] for r in results] == [0, 1, 2, 3] * 2
+    assert all(r.unwrap()[1] != os.getpid() for r in results)
+    assert results[0] is lazy_results[0].result()
+
+
+def test_async_lazy_result() -> None:
+    calls = []
+
+    @return_async_lazy_result
+    async def slow_double(x: int) -> Result[int, ValueError]:
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return Ok(2 * x)
+
+    async def main() -> None:
+        lazy = slow_double(21)
+        assert calls == []
+        assert not lazy.done()
+
+        results = await asyncio.gather(*[lazy for _ in range(10)])
+        assert results == [Ok(42)] * 10
+        assert await lazy == Ok(42)
+        assert lazy.done()
+
+    asyncio.run(main())
+    assert calls == [21]
+
+
+def test_cached_result_lru_and_ttl() -> None:
+    calls = []
+    now = 0.0
+
+    @cached_result(maxsize=2, ttl=10, clock=lambda: now)
+    def square(x: int, *, offset: int = 0) -> Result[int, ValueError]:
+        calls.append(x)
+        return Ok(x * x + offset)
+
+    assert square(2) == square(2) == Ok(4)
+    assert square(2, offset=1) == Ok(5)
+    assert calls == [2, 2]
+
+    square(3)  # Evicts square(2), which is the least recently used.
+    assert square(2, offset=1) == Ok(5)
+    assert square(2) == Ok(4)
+    assert calls == [2, 2, 3, 2]
+    assert square.cache_stats() == CacheStats(
+        hits=2, misses=4, maxsize=2, currsize=2
+    )
+
+    now = 10.0
+    assert square(2) == Ok(4)
+    assert calls == [2, 2, 3, 2, 2]
+
+    square.cache_clear()
+    assert square.cache_stats() == CacheStats(0, 0, 2, 0)
+    assert square.__name__ == "square"
+
+
+@pytest.mark.parametrize("cache_errors", [False, True])
+def test_cached_result_errors(cache_errors: bool) -> None:
+    calls = []
+
+    @cached_result(cache_errors=cache_errors)
+    def fail(x: int) -> Result[int, ValueError]:
+        calls.append(x)
+        return Err(ValueError(x))
+
+    assert isinstance(fail(1), Err)
+    assert isinstance(fail(1), Err)
+    assert len(calls) == (1 if cache_errors else 2)
+
+
+def test_cached_result_single_flight() -> None:
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    @cached_result()
+    def slow(x: int) -> Result[int, ValueError]:
+        calls.append(x)
+        started.set()
+        release.wait(timeout=10)
+        return Ok(x)
+
+    results: List[Result[int, ValueError]] = []
+    leader = threading.Thread(target=lambda: results.append(slow(1)))
+    leader.start()
+    started.wait(timeout=10)
+
+    followers = [
+        threading.Thread(target=lambda: results.append(slow(1)))
+        for _ in range(8)
+    ]
+    for thread in followers:
+        thread.start()
+
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(timeout=10)
+
+    assert calls == [1]
+    assert results == [Ok(1)] * 9
+    assert slow.cache_stats().misses == 1
+
+
+def test_result_batch() -> None:
+    errors = {i: ValueError(i) for i in range(0, 50, 7)}
+    results: List[Result[int, ValueError]] = [
+        Err(errors[i]) if i in errors else Ok(i) for i in range(50)
+    ]
+
+    batch = ResultBatch.from_results(iter(results))
+    assert len(batch) == 50
+    assert (batch.ok_count, batch.err_count) == (50 - len(errors), len(errors))
+    assert batch.to_list() == results
+    assert [batch[i] for i in range(50)] == results
+    assert batch[-2] == Ok(48)
+    assert list(batch.iter_errors()) == list(errors.items())
+    assert list(batch.iter_oks()) == [i for i in range(50) if i not in errors]
+    assert [batch.is_err(i) for i in range(50)] == [
+        i in errors for i in range(50)
+    ]
+
+    with pytest.raises(IndexError):
+        batch[50]
+
+
+def test_result_batch_edge_cases() -> None:
+    assert ResultBatch().to_list() == []
+
+    batch: ResultBatch[int, str] = ResultBatch()
+    batch.append_err("foo")
+    batch.append(return_lazy_result(lambda: Ok(1))())
+    batch.extend([Err("bar"), Err("baz")])
+    assert batch.to_list() == [Err("foo"), Ok(1), Err("bar"), Err("baz")]
+    assert repr(batch) == "ResultBatch(ok_count=1, err_count=3)"
+
+
+def test_result_batch_err_classes() -> None:
+    berr = BErr("Oops!")
+    results: List[Result[int, Exception]] = [Ok(1), berr, BErr("Again!")]
+    batch = ResultBatch.from_results(results)
+    assert batch.to_list() == results
+    assert all(isinstance(r, BErr) for r in batch.to_list()[1:])
+    assert batch[1] == berr
+    assert batch._err_classes is None
+
+    mixed = results + [Err(ValueError()), berr]
+    batch = ResultBatch.from_results(mixed)
+    assert batch.to_list() == mixed
+    assert [type(batch[i]) for i in range(5)] == [Ok, BErr, BErr, Err, BErr]
+
+
+def test_cached_result_method() -> None:
+    class Squarer:
+        def __init__(self, offset: int) -> None:
+            self.offset = offset
+            self.calls = 0
+
+        @cached_result()
+        def square(self, x: int) -> Result[int, ValueError]:
+            self.calls += 1
+            return Ok(x * x + self.offset)
+
+    a, b = Squarer(0), Squarer(1)
+    assert a.square(2) == a.square(2) == Ok(4)
+    assert b.square(2) == Ok(5)
+    assert (a.calls, b.calls) == (1, 1)
+    assert Squarer.square.cache_stats().currsize == 2
+
+
+def test_lazy_result_thread_safe() -> None:
+    calls = []
+    barrier = threading.Barrier(8, timeout=10)
+
+    @return_lazy_result
+    def slow() -> Result[int, ValueError]:
+        calls.append(1)
+        time.sleep(0.05)
+        return Ok(1)
+
+    lazy = slow()
+
+    def force() -> Result[int, ValueError]:
+        barrier.wait()
+        return lazy.result()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: force(), range(8)))
+
+    assert results == [Ok(1)] * 8
+    assert calls == [1]
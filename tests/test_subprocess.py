@@ -0,0 +1,321 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from bugyi import subprocess as bsp
+from bugyi.errors import BResult
+from bugyi.result import Err, Ok
+
+
+def test_safe_popen() -> None:
+    assert bsp.safe_popen(["echo", "foo"]) == Ok(("foo", ""))
+
+    result = bsp.safe_popen(["sh", "-c", "echo bar >&2; exit 3"])
+    assert isinstance(result, Err)
+    assert "Command Failed (ec=3)" in str(result.err())
+    assert "bar" in str(result.err())
+
+
+def test_async_safe_popen() -> None:
+    result = asyncio.run(bsp.async_safe_popen(["echo", "foo"]))
+    assert result == Ok(("foo", ""))
+
+    result = asyncio.run(bsp.async_safe_popen(["sh", "-c", "exit 3"]))
+    assert isinstance(result, Err)
+    assert "Command Failed (ec=3)" in str(result.err())
+
+
+def test_async_unsafe_popen() -> None:
+    out_err = asyncio.run(
+        bsp.async_unsafe_popen(["sh", "-c", "echo foo; echo bar >&2; exit 1"])
+    )
+    assert out_err == ("foo", "bar")
+
+
+def test_gather() -> None:
+    async def run() -> List[BResult]:
+        return await bsp.gather(
+            *[bsp.async_safe_popen(["echo", str(i)]) for i in range(100)],
+            max_concurrency=8,
+        )
+
+    results = asyncio.run(run())
+    assert [r.unwrap()[0] for r in results] == [str(i) for i in range(100)]
+
+
+def test_run_many(tmp_path: Path) -> None:
+    commands = [["sh", "-c", f"sleep 0.1; echo {i}"] for i in range(8)]
+    commands.append(bsp.Command(["pwd"], cwd=str(tmp_path)))
+    commands.append(bsp.Command(["sh", "-c", "echo $FOO"], env={"FOO": "x"}))
+
+    batch = bsp.run_many(commands, max_workers=8)
+    outs = [r.unwrap()[0] for r in batch]
+    assert outs == [str(i) for i in range(8)] + [str(tmp_path), "x"]
+    assert batch.stats.command_time > batch.stats.wall_time
+
+
+def test_run_many_unordered() -> None:
+    commands = [["sh", "-c", "sleep 0.2; exit 1"], ["echo", "fast"]]
+    results = list(bsp.run_many(commands, ordered=False))
+    assert results[0] == Ok(("fast", ""))
+    assert isinstance(results[1], Err)
+
+
+def test_stream_popen() -> None:
+    with bsp.stream_popen(["seq", "100000"], tail_lines=10) as proc:
+        total = sum(int(line) for line in proc)
+
+    assert total == sum(range(100001))
+    assert proc.result() == Ok(None)
+    assert proc.out.split("\n")[-1] == "100000"
+    assert len(proc.out.split("\n")) == 11
+
+
+def test_stream_popen_spill() -> None:
+    cmd = ["sh", "-c", "seq 10000 >&2; exit 1"]
+    with bsp.stream_popen(
+        cmd, tail_lines=5, spill_threshold=1024, keep_err_file=True
+    ) as proc:
+        result = proc.result()
+
+    assert isinstance(result, Err)
+    assert proc.err_path is not None
+    with open(proc.err_path) as f:
+        assert f.read().split() == [str(i) for i in range(1, 10001)]
+
+    emsg = result.err().args[0]
+    assert f"full output saved to {proc.err_path}" in emsg
+    assert emsg.endswith("\n".join(str(i) for i in range(9996, 10001)))
+    assert "\n1\n" not in emsg
+    os.remove(proc.err_path)
+
+
+def test_stream_popen_spill_cleanup() -> None:
+    cmd = ["sh", "-c", "seq 10000 >&2; exit 1"]
+    with bsp.stream_popen(cmd, spill_threshold=1024) as proc:
+        result = proc.result()
+        err_path = proc.err_path
+        assert err_path is not None and os.path.exists(err_path)
+
+    # The error must not point to a file that is about to be removed.
+    assert isinstance(result, Err)
+    emsg = result.err().args[0]
+    assert "[... 9900 earlier lines omitted ...]" in emsg
+    assert err_path not in emsg
+
+    assert proc.err_path is None
+    assert not os.path.exists(err_path)
+
+
+def test_stream_popen_invalid_utf8() -> None:
+    # A single undecodable byte must not stop STDERR from being drained.
+    script = "printf '\\377\\n' >&2; seq 50000 >&2; printf '\\377'"
+    cmd = ["sh", "-c", script]
+    with bsp.stream_popen(cmd, tail_lines=2) as proc:
+        assert list(proc) == ["\ufffd"]
+        assert proc.result() == Ok(None)
+
+    assert proc.err.endswith("\n49999\n50000")
+
+
+def test_safe_popen_raw() -> None:
+    proc = bsp.safe_popen_raw(["printf", "\\377\\n"]).unwrap()
+    assert proc.raw_out == b"\xff\n"
+    assert proc.out_view().obj is proc.raw_out
+    with pytest.raises(UnicodeDecodeError):
+        proc.out
+
+    result = bsp.safe_popen_raw(["sh", "-c", "printf '\\377' >&2; exit 1"])
+    assert isinstance(result, Err)
+    assert "�" in result.err().args[0]
+
+
+def test_command_exists(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert not bsp.command_exists("foo")
+
+    foo = tmp_path / "foo"
+    foo.write_text("#!/bin/sh\n")
+    foo.chmod(0o755)
+    (tmp_path / "bar").write_text("not executable")
+
+    assert bsp.which("foo") == str(foo)
+    assert bsp.commands_exist(["foo", "bar", "baz"]) == {
+        "foo": True,
+        "bar": False,
+        "baz": False,
+    }
+    assert bsp.command_exists(str(foo))
+
+    monkeypatch.setenv("PATH", "/nonexistent")
+    assert not bsp.command_exists("foo")
+
+
+def test_shell_worker(tmp_path: Path) -> None:
+    with bsp.ShellWorker() as worker:
+        assert worker.safe_popen(["echo", "foo bar"]) == Ok(("foo bar", ""))
+        assert worker.safe_popen(["pwd"], cwd=str(tmp_path)) == Ok(
+            (str(tmp_path), "")
+        )
+        assert worker.safe_popen(["printf", "no newline"]) == Ok(
+            ("no newline", "")
+        )
+
+        result = worker.safe_popen(["sh", "-c", "echo oops >&2; exit 3"])
+        assert isinstance(result, Err)
+        assert "Command Failed (ec=3)" in str(result.err())
+        assert "oops" in str(result.err())
+
+        result = worker.safe_popen(["exit", "5"])
+        assert isinstance(result, Err)
+        assert "Command Failed (ec=5)" in str(result.err())
+        assert worker.safe_popen(["echo", "restarted"]) == Ok(
+            ("restarted", "")
+        )
+
+
+@pytest.mark.filterwarnings("error::ResourceWarning")
+def test_shell_worker_env_and_cleanup(tmp_path: Path) -> None:
+    with bsp.ShellWorker() as worker:
+        env = {"PATH": os.environ["PATH"], "FOO": "foo bar"}
+        assert worker.safe_popen(
+            ["sh", "-c", 'echo "$FOO $HOME"'], env=env, cwd=str(tmp_path)
+        ) == Ok(("foo bar", ""))
+
+        # Restarting the worker must not leak its pipes.
+        fds_before = len(os.listdir("/proc/self/fd"))
+        for _ in range(5):
+            assert isinstance(worker.safe_popen(["exit", "1"]), Err)
+        assert len(os.listdir("/proc/self/fd")) == fds_before
+
+
+def test_shell_worker_inherits_environ(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("BUGYI_TEST_VAR", raising=False)
+    with bsp.ShellWorker() as worker:
+        cmd = ["printenv", "BUGYI_TEST_VAR"]
+        assert isinstance(worker.safe_popen(cmd), Err)
+
+        monkeypatch.setenv("BUGYI_TEST_VAR", "it's set")
+        assert worker.safe_popen(cmd) == Ok(("it's set", ""))
+
+        monkeypatch.delenv("BUGYI_TEST_VAR")
+        assert isinstance(worker.safe_popen(cmd), Err)
+
+
+def test_shell_worker_pool() -> None:
+    with bsp.ShellWorkerPool(size=2) as pool:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    pool.safe_popen, [["echo", str(i)] for i in range(20)]
+                )
+            )
+
+        assert [r.unwrap() for r in results] == [
+            (str(i), "") for i in range(20)
+        ]
+
+
+def test_popen_hooks(tmp_path: Path) -> None:
+    records: List[bsp.PopenRecord] = []
+    histogram = bsp.PopenHistogram(print_at_exit=False)
+    jsonl = bsp.JsonLinesSink(tmp_path / "popen.jsonl")
+    hooks = [records.append, histogram, jsonl, bsp.log_popen_record]
+
+    for hook in hooks:
+        bsp.add_popen_hook(hook)
+    try:
+        bsp.safe_popen(["echo", "foo"], cwd=str(tmp_path))
+        bsp.unsafe_popen(["sh", "-c", "echo barbaz >&2; exit 2"])
+    finally:
+        for hook in hooks:
+            bsp.remove_popen_hook(hook)
+
+    bsp.safe_popen(["true"])
+
+    assert len(records) == 2
+    assert records[0].argv == ["echo", "foo"]
+    assert records[0].cwd == str(tmp_path)
+    assert records[0].out_bytes == 4
+    assert records[0].returncode == 0
+    assert records[0].user_time is not None
+    assert records[0].max_rss is not None
+    assert records[1].err_bytes == 7
+    assert records[1].returncode == 2
+
+    summary = histogram.summary()
+    assert "echo: count=1 failed=0" in summary
+    assert "sh: count=1 failed=1" in summary
+
+    lines = (tmp_path / "popen.jsonl").read_text().splitlines()
+    assert [json.loads(line)["argv"] for line in lines] == [
+        ["echo", "foo"],
+        ["sh", "-c", "echo barbaz >&2; exit 2"],
+    ]
+
+
+def test_popen_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("FOO", "1")
+    counter = tmp_path / "counter"
+    cmd = ["sh", "-c", f'echo x >> {counter}; wc -l < {counter}; echo "$FOO"']
+
+    cache = bsp.PopenCache(ttl=60, maxsize=2, env_vars=["FOO"], disk=True)
+    assert bsp.safe_popen(cmd, cache=cache) == Ok(("1\n1", ""))
+    assert bsp.safe_popen(cmd, cache=cache) == Ok(("1\n1", ""))
+
+    monkeypatch.setenv("FOO", "2")
+    assert bsp.safe_popen(cmd, cache=cache) == Ok(("2\n2", ""))
+
+    # A new cache (e.g. in a later process) should find results on disk.
+    other_cache = bsp.PopenCache(ttl=60, env_vars=["FOO"], disk=True)
+    assert bsp.safe_popen(cmd, cache=other_cache) == Ok(("2\n2", ""))
+
+    cache.clear()
+    assert bsp.safe_popen(cmd, cache=cache) == Ok(("3\n2", ""))
+
+    expired_cache = bsp.PopenCache(ttl=0)
+    assert bsp.safe_popen(cmd, cache=expired_cache) == Ok(("4\n2", ""))
+    assert bsp.safe_popen(cmd, cache=expired_cache) == Ok(("5\n2", ""))
+
+
+def test_popen_cache_concurrent_disk_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    cache = bsp.PopenCache(disk=True, name="concurrent")
+
+    def put(i: int) -> None:
+        # Every thread writes the same key at the same time.
+        cache._put("key", (str(i), ""))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(put, range(200)))
+
+    assert cache.disk_dir is not None
+    assert [p.name for p in cache.disk_dir.iterdir()] == ["key"]
+
+    # Failing to write to the disk tier is not an error.
+    not_a_dir = tmp_path / "not-a-dir"
+    not_a_dir.touch()
+    cache.disk_dir = not_a_dir
+    assert bsp.safe_popen(["echo", "foo"], cache=cache) == Ok(("foo", ""))
+
+
+def test_popen_cache_errors_not_cached(tmp_path: Path) -> None:
+    flag = tmp_path / "flag"
+    cmd = ["sh", "-c", f"test -f {flag} && echo ok"]
+
+    cache = bsp.PopenCache()
+    assert isinstance(bsp.safe_popen(cmd, cache=cache), Err)
+    flag.touch()
+    assert bsp.safe_popen(cmd, cache=cache) == Ok(("ok", ""))